@@ -7,7 +7,15 @@ Date: December 2025
 
 import cv2
 import numpy as np
+import re
+import sys
+import struct
 import time
+import queue
+import threading
+import concurrent.futures
+from functools import lru_cache
+from operator import itemgetter
 import serial
 import serial.tools.list_ports
 try:
@@ -17,6 +25,24 @@ except ImportError:
     print("WARNING: pytesseract not installed. OCR number detection disabled.")
     print("Install with: pip install pytesseract")
     TESSERACT_AVAILABLE = False
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+    
+    def njit(*args, **kwargs):
+        """Fallback when numba is missing - leaves the function as plain Python"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+try:
+    CUDA_AVAILABLE = cv2.cuda.getCudaEnabledDeviceCount() > 0
+except (AttributeError, cv2.error):
+    CUDA_AVAILABLE = False  # OpenCV built without CUDA modules
+OPENCL_AVAILABLE = cv2.ocl.haveOpenCL()
+HAVE_POLL_KEY = hasattr(cv2, 'pollKey')  # OpenCV 4.5+
 
 # ============================================================================
 # CONFIGURATION SECTION
@@ -26,6 +52,8 @@ except ImportError:
 SERIAL_PORT = "COM3"      # Change to the Pico's COM port (e.g., COM5 on Windows, /dev/ttyACM0 on Linux)
 SERIAL_BAUD = 115200
 SERIAL_TIMEOUT = 0.01      # Seconds
+SERIAL_BINARY_POSITIONS = True  # Send positions as 4-byte frames (0xAA,id,row,col) instead of CSV
+POSITION_HEARTBEAT = 1.0  # Seconds before an unchanged position is sent again
 
 # Grid Configuration
 GRID_SIZE = 5  # 5x5 grid
@@ -35,56 +63,138 @@ CAMERA_INDEX = 1  # 0 for default webcam, 1 for external camera
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 480
 TARGET_FPS = 30
+OPENCV_THREADS = 1  # cv2.setNumThreads - the loop already runs blob and ArUco detection side by side (None = OpenCV default)
+CAPTURE_SKIP_STALE_DECODE = False  # Only decode a grab once the last frame was taken - saves decodes, but hands the loop a frame up to ~2 periods old
+CAPTURE_BUFFER_COUNT = 4  # Skip-stale mode: frames decode into a ring of reused buffers (a frame stays valid for 3 newer ones)
 
 # ArUco Configuration
 ARUCO_DICT = cv2.aruco.DICT_4X4_50  # ArUco dictionary type
 MIN_MARKER_AREA = 1000  # Minimum marker area in pixels
+ARUCO_USE_OPENCL = False  # Feed detectMarkers a cv2.UMat (T-API); most ArUco stages still run on the CPU
+ARUCO_MOTION_GATE = True  # Reuse the last detection while the scene is static
+MOTION_PIXEL_DELTA = 15  # Grayscale change that counts a pixel as moved
+MOTION_MIN_PIXELS = 500  # Moved pixels needed before ArUco detection reruns
+ARUCO_SEARCH_SCALE = 0.5  # Scale used to look for markers when none were seen last time
+ARUCO_ROI_MARGIN = 0.3  # Padding around last frame's markers (fraction of their bounding box)
+ARUCO_FULL_SCAN_INTERVAL = 15  # Full-resolution full-frame detection every Nth detection call (motion-gated ones included)
+ARUCO_DETECT_STRIDE = 2  # Detect every Nth frame, reuse the last markers (and overlay) in between
+ARUCO_FAST_PARAMS = True  # Single adaptive-threshold pass, no corner refinement (static, well-lit grid)
+ARUCO_USE_ARUCO3 = False  # Aruco3 pyramid search - faster, but misses small/blurred markers
+ARUCO3_MIN_MARKER_RATIO = 0.02  # Aruco3: smallest marker side as a fraction of the image size
 
 # Red Blob Detection (Electromagnet)
 LOWER_RED_HSV = np.array([0, 120, 70])    # Lower red hue range
 UPPER_RED_HSV = np.array([10, 255, 255])
 LOWER_RED_HSV_ALT = np.array([170, 120, 70])  # Upper red hue range (wraps around)
 UPPER_RED_HSV_ALT = np.array([180, 255, 255])
+RED_DETECT_BGR = False  # Threshold red directly in BGR instead of converting to HSV
+RED_HSV_SINGLE_RANGE = True  # HSV mode: one inRange on a hue-mirrored conversion instead of two + OR
+RED_BGR_DOMINANCE = 1.5  # BGR mode: red must exceed green and blue by this factor
+RED_BGR_MIN = 70  # BGR mode: minimum red channel value
 MIN_BLOB_AREA = 100  # Minimum blob area in pixels
+BLOB_DOWNSAMPLE = 2  # Clean up and measure the red mask at 1/N resolution
+BLOB_KERNEL_SHAPE = cv2.MORPH_RECT  # Mask cleanup element (MORPH_CROSS is cheaper, fills less)
+BLOB_DETECT_STRIDE = 2  # Full-frame red-blob search every Nth frame, ROI search in between
+BLOB_ROI_SIZE = 160  # Side of the square search window around the last blob (pixels)
+BLOB_ALWAYS_DETECT = False  # Debug: track the red blob before pickup too (only drawn, never used)
+USE_CUDA = True  # Build the red mask on the GPU when OpenCV has CUDA support (HSV mode only)
+USE_OPENCL = False  # Otherwise build it through OpenCV's OpenCL T-API (cv2.UMat) - upload/download per ROI usually costs more than it saves
+USE_NUMBA = True  # Otherwise build it with one fused Numba kernel when numba is installed (HSV mode only)
 VERIFY_DURATION = 5.0  # Hold target position for 5 seconds
+OCR_ROI_SIZE = 320  # Side of the centered square searched for the 4-digit number (pixels)
+OCR_INPUT_SIZE = 256  # OCR square is resized to this side before tesseract
 
 # Display Configuration
 SHOW_GRID_OVERLAY = True
 SHOW_FPS = True
+DISPLAY_EVERY_N_FRAMES = 3  # Draw overlays and refresh the window every Nth frame (tracking still runs every frame)
+THREADED_DISPLAY = sys.platform != 'darwin'  # Run the window (imshow/waitKey) on its own thread (Cocoa needs the main thread)
+DISPLAY_WINDOW_TIMEOUT = 5.0  # Seconds to wait for the display thread's window before falling back to the main thread
+HUD_CACHE_SIZE = 64  # Rendered HUD text strips kept for reuse
+WINDOW_NAME = 'Aruco WiFi Tracker - Forge Registry'
 SEND_INTERVAL = 0.1  # Send updates every 100ms (10Hz)
+HEADLESS = False  # No window: only capture, detect and send (quit with Ctrl+C)
+DETECT_INTERVAL = SEND_INTERVAL  # Headless: seconds between ArUco detections (windowed mode detects every ARUCO_DETECT_STRIDE frames)
 
 # Grid Configuration
 MANUAL_GRID_MODE = False     # Manual grid corner selection (press 'm' to activate)
+GRID_CORNERS = None  # Preset grid corners ((x1, y1), (x2, y2)) - needed when HEADLESS
 
 # Manual grid calibration points (top-left and bottom-right corners)
 manual_grid_corners = []
 
+# ============================================================================
+# CONSOLE LOGGING
+# ============================================================================
+
+# Messages from the tracking loop are written by a background thread so a slow
+# terminal never stalls frame processing
+LOG_QUEUE = queue.Queue(maxsize=64)
+
+def log_writer():
+    """Write queued console messages (runs on a daemon thread)"""
+    while True:
+        message = LOG_QUEUE.get()
+        sys.stdout.write(message + "\n")
+        sys.stdout.flush()
+        LOG_QUEUE.task_done()
+
+log_thread = None  # Started on the first message and kept for the life of the process
+
+def log_message(message):
+    """Queue a console message without blocking (dropped if the queue is full)"""
+    global log_thread
+    if log_thread is None:
+        log_thread = threading.Thread(target=log_writer, daemon=True)
+        log_thread.start()
+    try:
+        LOG_QUEUE.put_nowait(message)
+    except queue.Full:
+        pass
+
+def flush_log():
+    """Block until every queued console message has been written"""
+    LOG_QUEUE.join()
+
 # ============================================================================
 # OCR NUMBER DETECTION
 # ============================================================================
 
+# Configure tesseract to only recognize digits
+OCR_CONFIG = r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789'
+FOUR_DIGIT_PATTERN = re.compile(r'\b\d{4}\b')
+
+def ocr_roi(frame):
+    """Return (x1, y1, x2, y2) of the centered square searched by OCR"""
+    height, width = frame.shape[:2]
+    size = min(OCR_ROI_SIZE, width, height)
+    x1 = (width - size) // 2
+    y1 = (height - size) // 2
+    return x1, y1, x1 + size, y1 + size
+
 def detect_4digit_number(frame):
     """Detect a 4-digit number written in black ink on paper using OCR"""
     if not TESSERACT_AVAILABLE:
         return None
     
     try:
-        # Convert to grayscale
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        # Crop to the OCR square and shrink it - tesseract is faster on small inputs
+        x1, y1, x2, y2 = ocr_roi(frame)
+        roi = cv2.resize(frame[y1:y2, x1:x2], (OCR_INPUT_SIZE, OCR_INPUT_SIZE),
+                         interpolation=cv2.INTER_AREA)
+        
+        # Convert to grayscale (callers may pass an already-gray frame)
+        gray = roi if roi.ndim == 2 else cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
         
         # Apply thresholding to isolate black text on white/light background
         # Invert so text is white on black background (better for OCR)
         _, thresh = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY_INV)
         
-        # Configure tesseract to only recognize digits
-        custom_config = r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789'
-        
         # Run OCR
-        text = pytesseract.image_to_string(thresh, config=custom_config)
+        text = pytesseract.image_to_string(thresh, config=OCR_CONFIG)
         
         # Extract 4-digit numbers from detected text
-        import re
-        matches = re.findall(r'\b\d{4}\b', text)
+        matches = FOUR_DIGIT_PATTERN.findall(text)
         
         if matches:
             # Return the first 4-digit number found
@@ -144,9 +254,9 @@ def mouse_callback(event, x, y, flags, param):
     if event == cv2.EVENT_LBUTTONDOWN and MANUAL_GRID_MODE:
         if len(manual_grid_corners) < 2:
             manual_grid_corners.append((x, y))
-            print(f"Corner {len(manual_grid_corners)} set at: ({x}, {y})")
+            log_message(f"Corner {len(manual_grid_corners)} set at: ({x}, {y})")
             if len(manual_grid_corners) == 2:
-                print("Grid calibration complete! Press 'c' to confirm or 'r' to reset.")
+                log_message("Grid calibration complete! Press 'c' to confirm or 'r' to reset.")
 
 def create_manual_grid(frame_width, frame_height):
     """Create grid lines from two corner points"""
@@ -199,18 +309,26 @@ def pixel_to_grid_calibrated(cx, cy, v_lines, h_lines):
     
     return row, col
 
-def draw_detected_grid(frame, v_lines, h_lines):
-    """Draw the detected grid lines on the frame"""
-    if v_lines is None or h_lines is None:
-        return frame
+def pixel_to_grid_calibrated_batch(xs, ys, v_lines, h_lines):
+    """
+    Vectorized pixel_to_grid_calibrated for many points at once (one searchsorted per axis)
+    Returns: (rows, cols) int arrays, -1 where a point lies outside the grid on that axis
+    """
+    # Index of the last line at or left of/above each point (lines are sorted)
+    cols = np.searchsorted(v_lines, xs, side='right') - 1
+    rows = np.searchsorted(h_lines, ys, side='right') - 1
     
-    # Draw vertical lines
-    for x in v_lines:
-        cv2.line(frame, (int(x), 0), (int(x), frame.shape[0]), (0, 255, 0), 2)
+    # Past the last line is outside the grid too
+    cols[cols >= len(v_lines) - 1] = -1
+    rows[rows >= len(h_lines) - 1] = -1
     
-    # Draw horizontal lines
-    for y in h_lines:
-        cv2.line(frame, (0, int(y)), (frame.shape[1], int(y)), (0, 255, 0), 2)
+    return np.minimum(rows, GRID_SIZE - 1), np.minimum(cols, GRID_SIZE - 1)
+
+def render_detected_grid(image, v_lines, h_lines):
+    """Draw the detected grid lines and cell labels onto image"""
+    # Draw vertical and horizontal lines in one call
+    segments = grid_line_segments(v_lines, h_lines, image.shape[1], image.shape[0])
+    cv2.polylines(image, segments, False, (0, 255, 0), 2)
     
     # Draw cell labels
     for row in range(GRID_SIZE):
@@ -219,8 +337,28 @@ def draw_detected_grid(frame, v_lines, h_lines):
                 x_center = int((v_lines[col] + v_lines[col + 1]) / 2)
                 y_center = int((h_lines[row] + h_lines[row + 1]) / 2)
                 label = f"({row+1},{col+1})"
-                cv2.putText(frame, label, (x_center - 30, y_center), 
+                cv2.putText(image, label, (x_center - 30, y_center), 
                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+
+grid_overlay_key = None  # (frame size, grid lines) the cached grid overlay was rendered for
+grid_overlay = None  # (overlay, mask) for cv2.copyTo
+
+def draw_detected_grid(frame, v_lines, h_lines):
+    """Draw the detected grid lines on the frame"""
+    global grid_overlay_key, grid_overlay
+    if v_lines is None or h_lines is None:
+        return frame
+    
+    # Grid only changes on recalibration - render it once and copy it in every frame
+    height, width = frame.shape[:2]
+    key = (height, width, tuple(v_lines), tuple(h_lines))
+    if grid_overlay_key != key:
+        grid_overlay = render_static_overlay(
+            height, width, lambda image: render_detected_grid(image, v_lines, h_lines))
+        grid_overlay_key = key
+    
+    overlay, mask = grid_overlay
+    cv2.copyTo(overlay, mask, frame)
     
     return frame
 
@@ -228,103 +366,282 @@ def draw_detected_grid(frame, v_lines, h_lines):
 # GRID DRAWING FUNCTIONS
 # ============================================================================
 
+# Saturating channel sum for cv2.transform - nonzero wherever an overlay pixel was drawn
+OVERLAY_CHANNEL_SUM = np.ones((1, 3), np.float32)
+
+def render_static_overlay(height, width, draw):
+    """
+    Render a static overlay once by calling draw(image) on a blank image
+    (draw must not use pure black, which marks transparent pixels)
+    Returns: (overlay, mask) for cv2.copyTo
+    """
+    overlay = np.zeros((height, width, 3), np.uint8)
+    draw(overlay)
+    # Channel sum (saturating) is nonzero wherever anything was drawn
+    mask = cv2.transform(overlay, OVERLAY_CHANNEL_SUM)
+    return overlay, mask
+
+def grid_line_segments(v_lines, h_lines, width, height):
+    """Build full-height vertical and full-width horizontal line segments for cv2.polylines"""
+    segments = [[[int(x), 0], [int(x), height]] for x in v_lines]
+    segments += [[[0, int(y)], [width, int(y)]] for y in h_lines]
+    return np.array(segments, dtype=np.int32)
+
+class GridGeometry:
+    """Cell sizes, line segments and label anchors for an evenly divided frame"""
+    __slots__ = ('width', 'height', 'grid_size', 'cell_width', 'cell_height',
+                 'segments', 'label_positions', 'overlay')
+    
+    def __init__(self, width, height, grid_size):
+        self.width = width
+        self.height = height
+        self.grid_size = grid_size
+        self.cell_width = width // grid_size
+        self.cell_height = height // grid_size
+        
+        # Interior grid lines for a single cv2.polylines call
+        self.segments = grid_line_segments([i * self.cell_width for i in range(1, grid_size)],
+                                           [i * self.cell_height for i in range(1, grid_size)],
+                                           width, height)
+        
+        # Cell labels (1-indexed for user display) and their text origins
+        self.label_positions = [(f"({row+1},{col+1})",
+                                 (col * self.cell_width + self.cell_width // 2 - 35,
+                                  row * self.cell_height + self.cell_height // 2))
+                                for row in range(grid_size) for col in range(grid_size)]
+        
+        # Lines and labels pre-rendered for draw_grid_overlay
+        self.overlay = render_static_overlay(height, width, self.render)
+    
+    def render(self, image):
+        """Draw grid lines and cell labels onto image"""
+        cv2.polylines(image, self.segments, False, (255, 255, 255), 2)
+        for label, position in self.label_positions:
+            cv2.putText(image, label, position, 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 2)
+
+grid_geometry_cache = {}  # GridGeometry keyed by (width, height, grid size)
+
+def get_grid_geometry(frame, grid_size=5):
+    """Return the cached GridGeometry for this frame size"""
+    height, width = frame.shape[:2]
+    key = (width, height, grid_size)
+    geometry = grid_geometry_cache.get(key)
+    if geometry is None:
+        geometry = GridGeometry(width, height, grid_size)
+        grid_geometry_cache[key] = geometry
+    return geometry
+
 def draw_grid_overlay(frame, grid_size=5):
     """Draw a 5x5 grid overlay on the frame"""
-    height, width = frame.shape[:2]
-    cell_width = width // grid_size
-    cell_height = height // grid_size
-    
-    # Draw vertical lines
-    for i in range(1, grid_size):
-        x = i * cell_width
-        cv2.line(frame, (x, 0), (x, height), (255, 255, 255), 2)
-    
-    # Draw horizontal lines
-    for i in range(1, grid_size):
-        y = i * cell_height
-        cv2.line(frame, (0, y), (width, y), (255, 255, 255), 2)
-    
-    # Draw cell labels (1-indexed for user display)
-    for row in range(grid_size):
-        for col in range(grid_size):
-            x = col * cell_width + cell_width // 2
-            y = row * cell_height + cell_height // 2
-            label = f"({row+1},{col+1})"
-            cv2.putText(frame, label, (x - 35, y), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 2)
+    # Copy in the pre-rendered lines and labels
+    overlay, mask = get_grid_geometry(frame, grid_size).overlay
+    cv2.copyTo(overlay, mask, frame)
     
     return frame
 
+highlight_tiles = {}  # Cached color tiles keyed by (cell shape, color)
+
 def highlight_cell(frame, row, col, grid_size=5, color=(0, 255, 0)):
     """Highlight a specific cell where a marker is located"""
-    height, width = frame.shape[:2]
-    cell_width = width // grid_size
-    cell_height = height // grid_size
+    geometry = get_grid_geometry(frame, grid_size)
     
     # Calculate cell boundaries
-    x1 = col * cell_width
-    y1 = row * cell_height
-    x2 = x1 + cell_width
-    y2 = y1 + cell_height
-    
-    # Draw semi-transparent rectangle
-    overlay = frame.copy()
-    cv2.rectangle(overlay, (x1, y1), (x2, y2), color, -1)
-    cv2.addWeighted(overlay, 0.3, frame, 0.7, 0, frame)
+    x1 = col * geometry.cell_width
+    y1 = row * geometry.cell_height
+    x2 = x1 + geometry.cell_width
+    y2 = y1 + geometry.cell_height
+    
+    # Blend a solid color tile into the cell only (no full-frame copy)
+    roi = frame[y1:y2, x1:x2]
+    tile_key = (roi.shape, color)
+    tile = highlight_tiles.get(tile_key)
+    if tile is None:
+        tile = np.full(roi.shape, color, dtype=frame.dtype)
+        highlight_tiles[tile_key] = tile
+    cv2.addWeighted(roi, 0.7, tile, 0.3, 0, dst=roi)
     
     # Draw cell border
     cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3)
     
     return frame
 
+# ============================================================================
+# HUD TEXT
+# ============================================================================
+
+def render_hud(image, lines, top=0):
+    """Draw HUD text lines onto image, which starts at frame row top"""
+    for text, (x, y), scale, color, thickness in lines:
+        cv2.putText(image, text, (x, y - top), cv2.FONT_HERSHEY_SIMPLEX, scale, color, thickness)
+
+hud_cache = {}  # Rendered (top row, overlay, mask) strips keyed by (frame size, lines)
+
+def draw_hud(frame, lines):
+    """
+    Draw HUD text lines - ((text, origin, scale, color, thickness), ...) - onto the frame
+    The text strip is rendered once per distinct set of lines and copied in afterwards
+    """
+    if not lines:
+        return frame
+    
+    height, width = frame.shape[:2]
+    key = (height, width, lines)
+    strip = hud_cache.get(key)
+    if strip is None:
+        # Strip only spans the rows the glyphs touch, not the whole frame
+        top, bottom = height, 0
+        for text, origin, scale, _, thickness in lines:
+            (_, text_height), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX,
+                                                         scale, thickness)
+            top = min(top, origin[1] - text_height - thickness - 1)
+            bottom = max(bottom, origin[1] + baseline + thickness + 1)
+        top, bottom = max(top, 0), min(bottom, height)
+        strip = (top, *render_static_overlay(bottom - top, width,
+                                             lambda image: render_hud(image, lines, top)))
+        if len(hud_cache) >= HUD_CACHE_SIZE:
+            hud_cache.clear()
+        hud_cache[key] = strip
+    
+    top, overlay, mask = strip
+    cv2.copyTo(overlay, mask, frame[top:top + overlay.shape[0]])
+    
+    return frame
+
 # ============================================================================
 # ARUCO MARKER DETECTION FUNCTIONS
 # ============================================================================
 
-def detect_aruco_markers(frame, aruco_dict_type):
+def build_detector_parameters():
+    """Detector parameters - trimmed to one threshold pass when ARUCO_FAST_PARAMS is set"""
+    params = cv2.aruco.DetectorParameters()
+    if ARUCO_FAST_PARAMS:
+        # One adaptive window size instead of the default 3..23 sweep
+        params.adaptiveThreshWinSizeMin = 13
+        params.adaptiveThreshWinSizeMax = 13
+        params.adaptiveThreshWinSizeStep = 10
+        params.minMarkerPerimeterRate = 0.05
+        params.cornerRefinementMethod = cv2.aruco.CORNER_REFINE_NONE
+        params.perspectiveRemovePixelPerCell = 4
+    if ARUCO_USE_ARUCO3:
+        # Threshold and find contours on a downscaled image sized for the smallest marker
+        params.useAruco3Detection = True
+        params.minSideLengthCanonicalImg = 32
+        params.minMarkerLengthRatioOriginalImg = ARUCO3_MIN_MARKER_RATIO
+    return params
+
+# Build the detector once - dictionary and parameters never change between frames
+ARUCO_DETECTOR = cv2.aruco.ArucoDetector(cv2.aruco.getPredefinedDictionary(ARUCO_DICT),
+                                         build_detector_parameters())
+
+def run_aruco_detector(detector, image):
+    """Run detectMarkers on image (via cv2.UMat if enabled); returns (corners, ids) as arrays"""
+    if ARUCO_USE_OPENCL and OPENCL_AVAILABLE:
+        # UMat input gives UMat outputs - bring them back as arrays
+        corners, ids, _ = detector.detectMarkers(cv2.UMat(image))
+        return tuple(corner.get() for corner in corners), (ids.get() if ids is not None else None)
+    corners, ids, _ = detector.detectMarkers(image)
+    return corners, ids
+
+# Detection state carried between frames (reset by reset_tracker_state)
+aruco_last_gray = None  # Grayscale frame of the last real detection (motion reference)
+aruco_last_result = None  # (corners, ids, marker_data) returned while the scene is static
+aruco_roi = None  # (x0, y0, x1, y1) search window around the last markers
+aruco_call_count = 0  # Detection calls, for the periodic full scan
+
+def detect_aruco_markers(gray, detector=ARUCO_DETECTOR):
     """
-    Detect ArUco markers in the frame
+    Detect ArUco markers in a grayscale frame (converted once by the caller)
     Returns: list of marker IDs, corner coordinates, and centers
     """
-    # Load ArUco dictionary and parameters
-    aruco_dict = cv2.aruco.getPredefinedDictionary(aruco_dict_type)
-    aruco_params = cv2.aruco.DetectorParameters()
-    detector = cv2.aruco.ArucoDetector(aruco_dict, aruco_params)
-    
-    # Detect markers
-    corners, ids, rejected = detector.detectMarkers(frame)
+    global aruco_last_gray, aruco_last_result, aruco_roi, aruco_call_count
+    # Every call counts toward the periodic full scan, gated or not, so a marker the
+    # downscaled search missed in a static scene is still found at full resolution
+    aruco_call_count += 1
+    full_scan = aruco_call_count % ARUCO_FULL_SCAN_INTERVAL == 0
+    
+    # Pixels that changed since the last detected frame
+    moved = None
+    last_gray = aruco_last_gray
+    if last_gray is not None and last_gray.shape == gray.shape:
+        delta = cv2.absdiff(gray, last_gray)
+        _, moved = cv2.threshold(delta, MOTION_PIXEL_DELTA, 255, cv2.THRESH_BINARY, dst=delta)
+        moved_pixels = cv2.countNonZero(moved)
+        # Skip detection if little has changed
+        if ARUCO_MOTION_GATE and not full_scan and moved_pixels < MOTION_MIN_PIXELS:
+            return aruco_last_result
+    
+    # Detect markers - near last frame's markers, on a downscaled frame when there
+    # were none, and at full resolution every ARUCO_FULL_SCAN_INTERVAL calls
+    roi = aruco_roi
+    if roi is not None and moved is not None and not full_scan:
+        # Motion outside the window may be a new marker (plate 2 placed at (1,1)
+        # while plate 1 is tracked) - search the whole frame instead
+        x0, y0, x1, y1 = roi
+        full_scan = moved_pixels - cv2.countNonZero(moved[y0:y1, x0:x1]) >= MOTION_MIN_PIXELS
+    if full_scan:
+        corners, ids = run_aruco_detector(detector, gray)
+    elif roi is not None:
+        x0, y0, x1, y1 = roi
+        corners, ids = run_aruco_detector(detector, gray[y0:y1, x0:x1])
+        corners = tuple(corner + np.float32((x0, y0)) for corner in corners)
+        if ids is None:
+            # Markers left the window - search the whole frame
+            corners, ids = run_aruco_detector(detector, gray)
+    else:
+        small = cv2.resize(gray, None, fx=ARUCO_SEARCH_SCALE, fy=ARUCO_SEARCH_SCALE,
+                           interpolation=cv2.INTER_AREA)
+        corners, ids = run_aruco_detector(detector, small)
+        # Map pixel-center coordinates back to full resolution
+        scale = np.float32(1.0 / ARUCO_SEARCH_SCALE)
+        corners = tuple(corner * scale + (scale - 1) / 2 for corner in corners)
     
     marker_data = []
     
     if ids is not None and len(ids) > 0:
-        for i, marker_id in enumerate(ids):
-            # Get corner coordinates
-            corner = corners[i][0]
-            
-            # Calculate marker center
-            center_x = int(np.mean(corner[:, 0]))
-            center_y = int(np.mean(corner[:, 1]))
-            
-            # Calculate marker area (approximate)
-            area = cv2.contourArea(corner)
-            
-            # Only include markers above minimum area threshold
-            if area >= MIN_MARKER_AREA:
-                marker_data.append({
-                    'id': int(marker_id[0]),
-                    'center_x': center_x,
-                    'center_y': center_y,
-                    'corners': corner.tolist(),
-                    'area': area
-                })
+        # Centers and areas for all markers at once - (N, 4, 2) corners -> (N,) values
+        quads = np.concatenate(corners).reshape(-1, 4, 2)
+        centers = quads.mean(axis=1).astype(np.int32)
+        xs = quads[:, :, 0]
+        ys = quads[:, :, 1]
+        areas = 0.5 * np.abs(np.sum(xs * np.roll(ys, -1, axis=1) - np.roll(xs, -1, axis=1) * ys, axis=1))
+        
+        # Only include markers above minimum area threshold - values are unpacked
+        # to Python ints/floats in one call each rather than per marker
+        keep = np.flatnonzero(areas >= MIN_MARKER_AREA)
+        id_list = ids.ravel().tolist()
+        center_list = centers.tolist()
+        area_list = areas.tolist()
+        marker_data = [{
+            'id': id_list[i],
+            'center_x': center_list[i][0],
+            'center_y': center_list[i][1],
+            'corners': quads[i],
+            'area': area_list[i]
+        } for i in keep.tolist()]
+        
+        # Search window for the next frame: all markers plus a margin
+        (min_x, min_y), (max_x, max_y) = quads.min(axis=(0, 1)), quads.max(axis=(0, 1))
+        pad_x = (max_x - min_x) * ARUCO_ROI_MARGIN
+        pad_y = (max_y - min_y) * ARUCO_ROI_MARGIN
+        height, width = gray.shape[:2]
+        aruco_roi = (max(0, int(min_x - pad_x)), max(0, int(min_y - pad_y)),
+                                    min(width, int(max_x + pad_x) + 1), min(height, int(max_y + pad_y) + 1))
+    else:
+        aruco_roi = None
     
+    aruco_last_gray = gray
+    aruco_last_result = (corners, ids, marker_data)
     return corners, ids, marker_data
 
+marker_label_sizes = {}  # "ID: n" label sizes
+
 def draw_aruco_markers(frame, corners, ids, marker_data):
     """Draw detected ArUco markers on the frame with IDs and grid positions"""
     if ids is not None and len(ids) > 0:
-        # Draw marker boundaries
-        cv2.aruco.drawDetectedMarkers(frame, corners, ids)
+        # Draw marker boundaries - one polylines call for all markers (IDs are labelled below)
+        outlines = np.concatenate(corners).reshape(-1, 4, 2).round().astype(np.int32)
+        cv2.polylines(frame, list(outlines), True, (0, 255, 0), 2)
         
         # Add ID labels and grid positions at marker centers
         for data in marker_data:
@@ -341,8 +658,12 @@ def draw_aruco_markers(frame, corners, ids, marker_data):
             font_scale = 0.9
             thickness = 2
             
-            # Get text size for background
-            (text_width, text_height), baseline = cv2.getTextSize(text, font, font_scale, thickness)
+            # Get text size for background (cached per label)
+            text_size = marker_label_sizes.get(text)
+            if text_size is None:
+                text_size = cv2.getTextSize(text, font, font_scale, thickness)[0]
+                marker_label_sizes[text] = text_size
+            text_width, text_height = text_size
             
             # Draw background rectangle
             cv2.rectangle(frame, 
@@ -364,50 +685,282 @@ def draw_aruco_markers(frame, corners, ids, marker_data):
     
     return frame
 
+
 # ============================================================================
 # RED BLOB DETECTION (ELECTROMAGNET TRACKING)
 # ============================================================================
 
+# BGR red test as one transform: channels become (R - k*B, R - k*G, R), saturated to 0..255
+RED_BGR_TRANSFORM = np.array([[-RED_BGR_DOMINANCE, 0, 1],
+                              [0, -RED_BGR_DOMINANCE, 1],
+                              [0, 0, 1]], dtype=np.float32)
+RED_BGR_LOWER = np.array([1, 1, RED_BGR_MIN])
+RED_BGR_UPPER = np.array([255, 255, 255])
+
+# Converting BGR data as if it were RGB mirrors the hue around 120 (H' = 120 - H mod 180),
+# so the two red ranges at both ends of the hue circle meet in one range around 120
+RED_HSV_MIRRORED_LOWER = np.array([120 - UPPER_RED_HSV[0], LOWER_RED_HSV[1], LOWER_RED_HSV[2]])
+RED_HSV_MIRRORED_UPPER = np.array([300 - LOWER_RED_HSV_ALT[0], UPPER_RED_HSV[1], UPPER_RED_HSV[2]])
+
+# HSV bounds as plain tuples for the cv2.cuda.inRange scalar arguments
+RED_HSV_SCALARS = tuple(tuple(int(v) for v in bound) for bound in
+                        (LOWER_RED_HSV, UPPER_RED_HSV, LOWER_RED_HSV_ALT, UPPER_RED_HSV_ALT))
+RED_HSV_MIRRORED_SCALARS = tuple(tuple(int(v) for v in bound) for bound in
+                                 (RED_HSV_MIRRORED_LOWER, RED_HSV_MIRRORED_UPPER))
+
+# Morphology kernel shared by every frame (3x3 at half resolution ~ 5x5 at full).
+# Built with getStructuringElement so a rectangle takes OpenCV's separable fast path
+RED_BLOB_KERNEL = cv2.getStructuringElement(BLOB_KERNEL_SHAPE, (3, 3))
+
+def close_red_mask(small):
+    """
+    Fill holes in the downsampled red mask (in place)
+    Returns None when it has too few red pixels to hold a MIN_BLOB_AREA blob
+    """
+    # Cheap SIMD count first - closing only fills small gaps, it cannot create a blob
+    if cv2.countNonZero(small) * BLOB_DOWNSAMPLE * BLOB_DOWNSAMPLE < MIN_BLOB_AREA:
+        return None
+    return cv2.morphologyEx(small, cv2.MORPH_CLOSE, RED_BLOB_KERNEL, dst=small)
+
+red_mask_buffers = {}  # CPU work buffers keyed by input size (full frame and tracking ROI)
+
+def red_mask_cpu(frame):
+    """Build the cleaned red mask at 1/BLOB_DOWNSAMPLE resolution on the CPU (None if too little red)"""
+    # Reuse work buffers across frames (one set per input size: full frame and tracking ROI)
+    height, width = frame.shape[:2]
+    buffers = red_mask_buffers.get((height, width))
+    if buffers is None:
+        buffers = {
+            'color': np.empty((height, width, 3), np.uint8),
+            'mask': np.empty((height, width), np.uint8),
+            'mask_alt': np.empty((height, width), np.uint8),
+            'small': np.empty((height // BLOB_DOWNSAMPLE, width // BLOB_DOWNSAMPLE), np.uint8),
+        }
+        red_mask_buffers[(height, width)] = buffers
+    
+    if RED_DETECT_BGR:
+        # Dominant red straight from BGR - skips the HSV conversion pass
+        dominance = cv2.transform(frame, RED_BGR_TRANSFORM, dst=buffers['color'])
+        mask = cv2.inRange(dominance, RED_BGR_LOWER, RED_BGR_UPPER, dst=buffers['mask'])
+    elif RED_HSV_SINGLE_RANGE:
+        # Hue-mirrored HSV - both red ranges in a single inRange
+        hsv = cv2.cvtColor(frame, cv2.COLOR_RGB2HSV, dst=buffers['color'])
+        mask = cv2.inRange(hsv, RED_HSV_MIRRORED_LOWER, RED_HSV_MIRRORED_UPPER, dst=buffers['mask'])
+    else:
+        # Convert to HSV
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=buffers['color'])
+        
+        # Create masks for both red hue ranges (red wraps around in HSV)
+        mask1 = cv2.inRange(hsv, LOWER_RED_HSV, UPPER_RED_HSV, dst=buffers['mask'])
+        mask2 = cv2.inRange(hsv, LOWER_RED_HSV_ALT, UPPER_RED_HSV_ALT, dst=buffers['mask_alt'])
+        mask = cv2.bitwise_or(mask1, mask2, dst=buffers['mask'])
+    
+    # Shrink the mask - a 5x5 grid cell only needs a coarse centroid
+    small = buffers['small']
+    cv2.resize(mask, (small.shape[1], small.shape[0]), dst=small, interpolation=cv2.INTER_NEAREST)
+    
+    # Single closing pass to fill holes (MIN_BLOB_AREA already rejects speckle noise)
+    return close_red_mask(small)
+
+
+cuda_red_mask = None  # Stream and device buffers, created on first use
+
+def red_mask_cuda(frame):
+    """Build the same mask as red_mask_cpu on the GPU - one upload, one small download (None if too little red)"""
+    global cuda_red_mask
+    if cuda_red_mask is None:
+        cuda_red_mask = {
+            'stream': cv2.cuda.Stream(),
+            'frame': cv2.cuda.GpuMat(),
+            'hsv': cv2.cuda.GpuMat(),
+            'mask': cv2.cuda.GpuMat(),
+            'mask_alt': cv2.cuda.GpuMat(),
+            'small': cv2.cuda.GpuMat(),
+        }
+    gpu = cuda_red_mask
+    
+    stream = gpu['stream']
+    height, width = frame.shape[:2]
+    small_size = (width // BLOB_DOWNSAMPLE, height // BLOB_DOWNSAMPLE)
+    
+    # Whole chain stays on the device; only the downsampled mask comes back
+    gpu['frame'].upload(frame, stream)
+    if RED_HSV_SINGLE_RANGE:
+        cv2.cuda.cvtColor(gpu['frame'], cv2.COLOR_RGB2HSV,
+                          dst=gpu['hsv'], stream=stream)
+        cv2.cuda.inRange(gpu['hsv'], *RED_HSV_MIRRORED_SCALARS,
+                         dst=gpu['mask'], stream=stream)
+    else:
+        cv2.cuda.cvtColor(gpu['frame'], cv2.COLOR_BGR2HSV,
+                          dst=gpu['hsv'], stream=stream)
+        cv2.cuda.inRange(gpu['hsv'], RED_HSV_SCALARS[0], RED_HSV_SCALARS[1],
+                         dst=gpu['mask'], stream=stream)
+        cv2.cuda.inRange(gpu['hsv'], RED_HSV_SCALARS[2], RED_HSV_SCALARS[3],
+                         dst=gpu['mask_alt'], stream=stream)
+        cv2.cuda.bitwise_or(gpu['mask'], gpu['mask_alt'],
+                            dst=gpu['mask'], stream=stream)
+    cv2.cuda.resize(gpu['mask'], small_size, dst=gpu['small'],
+                    interpolation=cv2.INTER_NEAREST, stream=stream)
+    small = gpu['small'].download(stream)
+    stream.waitForCompletion()
+    
+    # Closing the small mask on the CPU keeps the too-little-red early exit
+    return close_red_mask(small)
+
+
+def red_mask_opencl(frame):
+    """Build the same mask as red_mask_cpu through cv2.UMat so OpenCV can run it on OpenCL (None if too little red)"""
+    height, width = frame.shape[:2]
+    frame_u = cv2.UMat(frame)
+    
+    if RED_DETECT_BGR:
+        dominance = cv2.transform(frame_u, RED_BGR_TRANSFORM)
+        mask = cv2.inRange(dominance, RED_BGR_LOWER, RED_BGR_UPPER)
+    elif RED_HSV_SINGLE_RANGE:
+        hsv = cv2.cvtColor(frame_u, cv2.COLOR_RGB2HSV)
+        mask = cv2.inRange(hsv, RED_HSV_MIRRORED_LOWER, RED_HSV_MIRRORED_UPPER)
+    else:
+        hsv = cv2.cvtColor(frame_u, cv2.COLOR_BGR2HSV)
+        mask = cv2.bitwise_or(cv2.inRange(hsv, LOWER_RED_HSV, UPPER_RED_HSV),
+                              cv2.inRange(hsv, LOWER_RED_HSV_ALT, UPPER_RED_HSV_ALT))
+    
+    small = cv2.resize(mask, (width // BLOB_DOWNSAMPLE, height // BLOB_DOWNSAMPLE),
+                       interpolation=cv2.INTER_NEAREST)
+    
+    # Only the downsampled mask is copied back - closed on the CPU like the other paths
+    return close_red_mask(small.get())
+
+# Both HSV ranges as one array for the Numba kernel: lower, upper, lower alt, upper alt
+RED_HSV_BOUNDS = np.array([LOWER_RED_HSV, UPPER_RED_HSV, LOWER_RED_HSV_ALT, UPPER_RED_HSV_ALT],
+                          dtype=np.int32)
+
+@njit(parallel=True, fastmath=True, cache=True)
+def red_mask_kernel(frame, step, bounds, out):
+    """
+    Fused red mask: reads only every step-th pixel, converts it to OpenCV's 8-bit
+    HSV scale inline and tests both hue ranges - no HSV image, no second mask, no resize
+    """
+    h_lo, s_lo, v_lo = bounds[0, 0], bounds[0, 1], bounds[0, 2]
+    h_hi, s_hi, v_hi = bounds[1, 0], bounds[1, 1], bounds[1, 2]
+    h_lo_alt, s_lo_alt, v_lo_alt = bounds[2, 0], bounds[2, 1], bounds[2, 2]
+    h_hi_alt, s_hi_alt, v_hi_alt = bounds[3, 0], bounds[3, 1], bounds[3, 2]
+    v_min = min(v_lo, v_lo_alt)
+    s_min = min(s_lo, s_lo_alt)
+    
+    rows, cols = out.shape
+    for y in prange(rows):
+        for x in range(cols):
+            b = np.int32(frame[y * step, x * step, 0])
+            g = np.int32(frame[y * step, x * step, 1])
+            r = np.int32(frame[y * step, x * step, 2])
+            v = max(b, g, r)
+            diff = v - min(b, g, r)
+            out[y, x] = 0
+            
+            # Too dark or too grey for either range - skip the hue math
+            if v < v_min or diff * 255 + v // 2 < s_min * v:
+                continue
+            
+            s = (diff * 255 + v // 2) // v
+            if v == r:
+                h = 60.0 * (g - b) / diff
+            elif v == g:
+                h = 120.0 + 60.0 * (b - r) / diff
+            else:
+                h = 240.0 + 60.0 * (r - g) / diff
+            if h < 0:
+                h += 360.0
+            hue = np.int32(h * 0.5 + 0.5)
+            
+            if ((h_lo <= hue <= h_hi and s_lo <= s <= s_hi and v_lo <= v <= v_hi) or
+                    (h_lo_alt <= hue <= h_hi_alt and s_lo_alt <= s <= s_hi_alt
+                     and v_lo_alt <= v <= v_hi_alt)):
+                out[y, x] = 255
+
+red_mask_numba_buffers = {}  # Output masks keyed by input size
+
+def red_mask_numba(frame):
+    """Build the same mask as red_mask_cpu with one Numba pass over the sampled pixels"""
+    height, width = frame.shape[:2]
+    small = red_mask_numba_buffers.get((height, width))
+    if small is None:
+        small = np.empty((height // BLOB_DOWNSAMPLE, width // BLOB_DOWNSAMPLE), np.uint8)
+        red_mask_numba_buffers[(height, width)] = small
+    
+    red_mask_kernel(frame, BLOB_DOWNSAMPLE, RED_HSV_BOUNDS, small)
+    return close_red_mask(small)
+
+
 def detect_red_blob(frame):
     """
     Detect red blob (electromagnet) in the frame
     Returns: (cx, cy, area) if found, or (None, None, 0) if not found
     """
-    # Convert to HSV
-    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-    
-    # Create masks for both red hue ranges (red wraps around in HSV)
-    mask1 = cv2.inRange(hsv, LOWER_RED_HSV, UPPER_RED_HSV)
-    mask2 = cv2.inRange(hsv, LOWER_RED_HSV_ALT, UPPER_RED_HSV_ALT)
-    mask = cv2.bitwise_or(mask1, mask2)
+    if USE_CUDA and CUDA_AVAILABLE and not RED_DETECT_BGR:
+        mask = red_mask_cuda(frame)
+    elif USE_OPENCL and OPENCL_AVAILABLE:
+        mask = red_mask_opencl(frame)
+    elif USE_NUMBA and NUMBA_AVAILABLE and not RED_DETECT_BGR:
+        mask = red_mask_numba(frame)
+    else:
+        mask = red_mask_cpu(frame)
     
-    # Morphological operations to reduce noise
-    kernel = np.ones((5, 5), np.uint8)
-    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
-    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+    # Not enough red in view for a blob
+    if mask is None:
+        return None, None, 0
     
-    # Find contours
-    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    # Label blobs - areas and centroids come back from a single pass
+    num_labels, _, stats, centroids = cv2.connectedComponentsWithStats(mask, connectivity=8,
+                                                                       ltype=cv2.CV_32S)
     
-    if not contours:
+    # Label 0 is the background
+    if num_labels <= 1:
         return None, None, 0
     
-    # Find largest contour
-    largest_contour = max(contours, key=cv2.contourArea)
-    area = cv2.contourArea(largest_contour)
+    # Find largest blob
+    largest = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+    area = int(stats[largest, cv2.CC_STAT_AREA]) * BLOB_DOWNSAMPLE * BLOB_DOWNSAMPLE
     
     # Check minimum area threshold
     if area < MIN_BLOB_AREA:
         return None, None, 0
     
-    # Calculate centroid
-    M = cv2.moments(largest_contour)
-    if M["m00"] == 0:
-        return None, None, 0
+    # Scale centroid back to full-resolution pixel coordinates
+    cx = int(centroids[largest, 0] * BLOB_DOWNSAMPLE)
+    cy = int(centroids[largest, 1] * BLOB_DOWNSAMPLE)
     
-    cx = int(M["m10"] / M["m00"])
-    cy = int(M["m01"] / M["m00"])
+    return cx, cy, area
+
+# Blob tracking state (reset by reset_tracker_state)
+blob_frame_index = 0  # Frames tracked, for the periodic full-frame search
+blob_last_position = None  # (x, y) of the blob in the last frame, None when lost
+
+def track_red_blob(frame):
+    """
+    Track the red blob across frames - searches only a window around the last
+    position on most frames and falls back to the full frame every
+    BLOB_DETECT_STRIDE frames or whenever the blob is lost
+    Returns: (cx, cy, area) if found, or (None, None, 0) if not found
+    """
+    global blob_frame_index, blob_last_position
+    blob_frame_index += 1
+    last = blob_last_position
+    height, width = frame.shape[:2]
     
+    if last is not None and blob_frame_index % BLOB_DETECT_STRIDE != 0:
+        # Fixed-size window (shifted to stay inside the frame) so work buffers are reused
+        roi_width = min(BLOB_ROI_SIZE, width)
+        roi_height = min(BLOB_ROI_SIZE, height)
+        x0 = max(0, min(last[0] - roi_width // 2, width - roi_width))
+        y0 = max(0, min(last[1] - roi_height // 2, height - roi_height))
+        cx, cy, area = detect_red_blob(frame[y0:y0 + roi_height, x0:x0 + roi_width])
+        if cx is not None:
+            blob_last_position = (cx + x0, cy + y0)
+            return cx + x0, cy + y0, area
+    
+    # Full-frame search
+    cx, cy, area = detect_red_blob(frame)
+    blob_last_position = (cx, cy) if cx is not None else None
     return cx, cy, area
 
 def draw_red_blob(frame, cx, cy, row, col, verified=False, progress=0.0):
@@ -467,8 +1020,8 @@ def pixel_to_grid(cx, cy, frame_width, frame_height, grid_size=5):
     Convert pixel coordinates to grid coordinates (0-indexed)
     Returns: (row, col) tuple with values from 0 to grid_size-1
     """
-    col = int(cx / (frame_width / grid_size))
-    row = int(cy / (frame_height / grid_size))
+    col = int(cx * grid_size / frame_width)
+    row = int(cy * grid_size / frame_height)
     
     # Ensure coordinates are within valid range
     col = max(0, min(col, grid_size - 1))
@@ -499,8 +1052,96 @@ def open_serial(port, baud):
         return None
 
 
+class SerialWriter(threading.Thread):
+    """Writes to the serial port on a background thread so the tracking loop never waits on the UART"""
+    def __init__(self, ser, max_pending=8):
+        super().__init__(daemon=True)
+        self.ser = ser
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.write_error = None  # Last serial write failure, cleared by the next good write
+        
+    def run(self):
+        """Send queued messages in order until close() posts the stop marker"""
+        running = True
+        while running:
+            # Coalesce everything already queued into a single write
+            batch = [self.pending.get()]
+            while True:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                batch = batch[:batch.index(None)]
+                running = False
+            if not batch:
+                continue
+            try:
+                self.ser.write(b"".join(batch))
+                self.write_error = None
+            except Exception as e:
+                self.write_error = e
+                log_message(f"ERROR writing to serial: {e}")
+    
+    def write(self, data, droppable=False):
+        """
+        Queue bytes for sending
+        Droppable position updates are skipped if the queue is full; commands wait for space
+        Returns True if queued and the port is writing - False if the queue is full
+        or the last write failed (the data is still queued for the next attempt)
+        """
+        try:
+            if droppable:
+                self.pending.put_nowait(data)
+            else:
+                self.pending.put(data, timeout=1.0)
+        except queue.Full:
+            return False
+        return self.write_error is None
+    
+    def close(self):
+        """Send what is queued, then close the port"""
+        try:
+            self.pending.put(None, timeout=1.0)
+        except queue.Full:
+            pass
+        self.join(timeout=1.0)
+        self.ser.close()
+
+
+# Binary position frame: sync byte then id, row, col (sync never appears in text commands)
+POSITION_SYNC = 0xAA
+POSITION_FRAME = struct.Struct('<BBBB')
+RELEASE_COMMAND = b"RELEASE\n"
+
+@lru_cache(maxsize=64)
+def encode_position(marker_id, row, col):
+    """Encode a marker/blob position for the Pico (binary frame or CSV line) - cached, positions repeat"""
+    if SERIAL_BINARY_POSITIONS:
+        return POSITION_FRAME.pack(POSITION_SYNC, marker_id & 0xFF, row & 0xFF, col & 0xFF)
+    return f"{marker_id},{row},{col}\n".encode('ascii')
+
+# Send dedupe state (reset by reset_tracker_state)
+last_position_data = None  # Last position queued for the Pico
+last_position_time = 0.0
+
+def send_position(ser, data):
+    """
+    Queue an encoded position unless the Pico already has it
+    An unchanged position is only repeated every POSITION_HEARTBEAT seconds
+    """
+    global last_position_data, last_position_time
+    now = time.monotonic()
+    if data == last_position_data and now - last_position_time < POSITION_HEARTBEAT:
+        return ser.write_error is None
+    if not ser.write(data, droppable=True):
+        return False
+    last_position_data = data
+    last_position_time = now
+    return True
+
 def send_marker_data(ser, marker_data_list):
-    """Send the first detected marker as CSV: id,row,col
+    """Send the largest detected marker position: id,row,col
 """
     if ser is None:
         return False
@@ -508,29 +1149,24 @@ def send_marker_data(ser, marker_data_list):
         return False
 
     # Choose the largest marker to prioritize the closest/clearest
-    primary = sorted(marker_data_list, key=lambda m: m.get('area', 0), reverse=True)[0]
-    line = f"{primary['id']},{primary['grid_row']},{primary['grid_col']}\n"
-    try:
-        ser.write(line.encode('utf-8'))
-        ser.flush()
-        return True
-    except Exception as e:
-        print(f"ERROR writing to serial: {e}")
+    primary = max(marker_data_list, key=itemgetter('area'))
+    if primary['grid_row'] is None or primary['grid_col'] is None:
         return False
+    data = encode_position(primary['id'], primary['grid_row'], primary['grid_col'])
+    return send_position(ser, data)
 
 def send_release_command(ser):
     """Send release command to Pico: RELEASE
 """
+    global last_position_data
     if ser is None:
         return False
-    try:
-        ser.write(b"RELEASE\n")
-        ser.flush()
-        print("Sent RELEASE command to Pico")
-        return True
-    except Exception as e:
-        print(f"ERROR sending release: {e}")
+    if not ser.write(RELEASE_COMMAND):
+        log_message("ERROR sending release: serial queue full or port failing")
         return False
+    last_position_data = None  # Resend the position right after the command
+    log_message("Sent RELEASE command to Pico")
+    return True
 
 def send_blob_position(ser, marker_id, row, col):
     """Send current blob position to Pico for real-time LCD update.
@@ -541,29 +1177,21 @@ def send_blob_position(ser, marker_id, row, col):
         return False
     if row is None or col is None:
         return False
-    try:
-        line = f"{marker_id},{row},{col}\n"
-        ser.write(line.encode('utf-8'))
-        ser.flush()
-        return True
-    except Exception as e:
-        print(f"ERROR sending blob position: {e}")
-        return False
+    return send_position(ser, encode_position(marker_id, row, col))
 
 def send_pickup_command(ser, marker_id, target_row, target_col):
     """Send pickup command to Pico: PICKUP,id,target_row,target_col
     """
+    global last_position_data
     if ser is None:
         return False
-    try:
-        command = f"PICKUP,{marker_id},{target_row},{target_col}\n"
-        ser.write(command.encode('utf-8'))
-        ser.flush()
-        print(f"Sent PICKUP command for marker ID {marker_id} -> target ({target_row+1},{target_col+1})")
-        return True
-    except Exception as e:
-        print(f"ERROR sending pickup: {e}")
+    command = f"PICKUP,{marker_id},{target_row},{target_col}\n"
+    if not ser.write(command.encode('ascii')):
+        log_message("ERROR sending pickup: serial queue full or port failing")
         return False
+    last_position_data = None  # Resend the position right after the command
+    log_message(f"Sent PICKUP command for marker ID {marker_id} -> target ({target_row+1},{target_col+1})")
+    return True
 
 class PositionVerifier:
     """Tracks if red blob stays at target position for required duration"""
@@ -581,18 +1209,21 @@ class PositionVerifier:
         self.start_time = None
         self.verified = False
         
-    def update(self, current_row, current_col):
+    def update(self, current_row, current_col, now=None):
         """
         Update verification state with current position
+        now: the frame's timestamp (read from the clock if omitted)
         Returns True if position held for full duration
         """
         if self.target_row is None or self.verified:
             return self.verified
             
         if current_row == self.target_row and current_col == self.target_col:
+            if now is None:
+                now = time.monotonic()
             if self.start_time is None:
-                self.start_time = time.time()
-            elif time.time() - self.start_time >= self.duration:
+                self.start_time = now
+            elif now - self.start_time >= self.duration:
                 self.verified = True
                 return True
         else:
@@ -601,11 +1232,11 @@ class PositionVerifier:
             
         return False
     
-    def get_progress(self):
-        """Get verification progress (0.0 to 1.0)"""
+    def get_progress(self, now=None):
+        """Get verification progress (0.0 to 1.0) at now (read from the clock if omitted)"""
         if self.start_time is None:
             return 0.0
-        elapsed = time.time() - self.start_time
+        elapsed = (time.monotonic() if now is None else now) - self.start_time
         return min(elapsed / self.duration, 1.0)
     
     def reset(self):
@@ -615,15 +1246,199 @@ class PositionVerifier:
         self.start_time = None
         self.verified = False
 
+# ============================================================================
+# CAMERA CAPTURE
+# ============================================================================
+
+class FrameGrabber(threading.Thread):
+    """Reads frames on a background thread and keeps only the newest one"""
+    def __init__(self, cap):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.lock = threading.Lock()
+        self.new_frame = threading.Condition(self.lock)
+        self.latest = None
+        self.frame_seq = 0
+        self.read_seq = 0
+        self.running = True
+        # Preallocated frames - retrieve() decodes into these instead of a new array.
+        # Only used with skip-stale decoding, which never runs more than one frame
+        # ahead of the loop; plain read() decodes at camera rate, so it gets fresh arrays
+        self.buffers = [None] * CAPTURE_BUFFER_COUNT
+        self.buffer_index = 0
+        
+    def run(self):
+        """Capture loop - overwrites the single frame slot on every read"""
+        while self.running:
+            if CAPTURE_SKIP_STALE_DECODE:
+                # grab() only dequeues; skip the decode while the slot is still unread
+                ret = self.cap.grab()
+                if ret and self.frame_seq != self.read_seq:
+                    continue
+                ret, frame = self.cap.retrieve(self.buffers[self.buffer_index]) if ret else (False, None)
+                if ret:
+                    self.buffers[self.buffer_index] = frame
+                    self.buffer_index = (self.buffer_index + 1) % CAPTURE_BUFFER_COUNT
+            else:
+                ret, frame = self.cap.read()
+            with self.new_frame:
+                if not ret:
+                    self.running = False
+                else:
+                    self.latest = frame
+                    self.frame_seq += 1
+                self.new_frame.notify_all()
+    
+    def get(self, poll_interval=1.0):
+        """
+        Wait for a frame newer than the last one returned - as long as a blocking
+        read would (slow first frames and USB stalls are waited out)
+        Returns None only once the capture thread has stopped
+        """
+        with self.new_frame:
+            # Re-check every poll_interval in case the thread died without notifying
+            while self.frame_seq == self.read_seq and self.running and self.is_alive():
+                self.new_frame.wait(poll_interval)
+            if self.frame_seq == self.read_seq:
+                return None
+            self.read_seq = self.frame_seq
+            return self.latest
+    
+    def stop(self):
+        """Stop the capture loop and wait for the thread to exit"""
+        self.running = False
+        self.join(timeout=1.0)
+
+# ============================================================================
+# DISPLAY WINDOW
+# ============================================================================
+
+class DisplayWindow:
+    """
+    Owns the HighGUI window - imshow/waitKey run on a dedicated thread when
+    threaded, so the tracking loop never waits on the GUI. All window calls
+    happen on one thread, as HighGUI requires.
+    """
+    def __init__(self, name, width, height, on_mouse=None, threaded=True):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.on_mouse = on_mouse
+        self.threaded = threaded
+        self.lock = threading.Lock()
+        self.pending_frame = None
+        self.keys = queue.Queue()
+        self.running = False
+        self.thread = None
+        self.window_ready = threading.Event()
+        
+    def start(self):
+        """
+        Create the window (on the display thread when threaded)
+        Falls back to the calling thread if the backend refuses a window off the main thread
+        """
+        self.running = True
+        if self.threaded:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+            if not self.window_ready.wait(DISPLAY_WINDOW_TIMEOUT):
+                print("WARNING: Display thread did not open the window in time - using the main thread")
+                self.threaded = False
+        if not self.threaded:
+            self.thread = None
+            self.create_window()
+        return self
+    
+    def create_window(self):
+        """Create the resizable window and attach the mouse callback"""
+        cv2.namedWindow(self.name, cv2.WINDOW_NORMAL)
+        cv2.resizeWindow(self.name, self.width, self.height)
+        if self.on_mouse is not None:
+            cv2.setMouseCallback(self.name, self.on_mouse)
+    
+    def run(self):
+        """Display loop - shows the newest posted frame and queues key presses"""
+        try:
+            self.create_window()
+        except Exception as e:
+            print(f"WARNING: Cannot open the window on a display thread ({e}) - using the main thread")
+            self.threaded = False
+            return
+        finally:
+            self.window_ready.set()
+        if not self.threaded:
+            # start() gave up waiting and moved the window to the main thread
+            return
+        while self.running:
+            with self.lock:
+                frame = self.pending_frame
+                self.pending_frame = None
+            if frame is not None:
+                cv2.imshow(self.name, frame)
+            key = cv2.waitKey(10) & 0xFF
+            if key != 0xFF:
+                self.keys.put(key)
+        cv2.destroyAllWindows()
+    
+    def show(self, frame):
+        """Post a frame for display (replaces any frame not yet shown)"""
+        if self.threaded:
+            with self.lock:
+                self.pending_frame = frame
+        else:
+            cv2.imshow(self.name, frame)
+    
+    def poll_key(self):
+        """Return the next key pressed, or 0xFF if none"""
+        if not self.threaded:
+            # pollKey pumps GUI events without waitKey's 1 ms sleep (OpenCV 4.5+)
+            return (cv2.pollKey() if HAVE_POLL_KEY else cv2.waitKey(1)) & 0xFF
+        try:
+            return self.keys.get_nowait()
+        except queue.Empty:
+            return 0xFF
+    
+    def stop(self):
+        """Close the window"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+        else:
+            cv2.destroyAllWindows()
+
 # ============================================================================
 # MAIN TRACKING LOOP
 # ============================================================================
 
+def reset_tracker_state():
+    """Clear state and caches left over from a previous main() run"""
+    global aruco_last_gray, aruco_last_result, aruco_roi, aruco_call_count
+    global blob_frame_index, blob_last_position
+    global last_position_data, last_position_time
+    global grid_overlay_key, grid_overlay, cuda_red_mask
+    
+    aruco_last_gray = None
+    aruco_last_result = None
+    aruco_roi = None
+    aruco_call_count = 0
+    blob_frame_index = 0
+    blob_last_position = None
+    last_position_data = None
+    last_position_time = 0.0
+    grid_overlay_key = None
+    grid_overlay = None
+    cuda_red_mask = None
+    for cache in (grid_geometry_cache, highlight_tiles, hud_cache, marker_label_sizes,
+                  red_mask_buffers, red_mask_numba_buffers):
+        cache.clear()
+
 def main():
     """Main function to run the Aruco tracking system"""
     
     global MANUAL_GRID_MODE, manual_grid_corners
     
+    reset_tracker_state()
+    
     print("=" * 70)
     print("ARUCO MARKER SERIAL TRACKER - FORGE REGISTRY STATION")
     print("=" * 70)
@@ -660,9 +1475,22 @@ def main():
             test_mode = True
         else:
             print(f"Serial connection established on {port}")
+            # Writes go through a background thread from here on
+            ser = SerialWriter(ser)
+            ser.start()
+    
+    # One OpenCV thread per caller - avoids thread-pool dispatch on small frames and
+    # the detectMarkers stall seen on some AMD CPUs; raise it for 1080p+ input
+    if OPENCV_THREADS is not None:
+        cv2.setNumThreads(OPENCV_THREADS)
     
     # Initialize webcam
     cap = cv2.VideoCapture(CAMERA_INDEX)
+    # Keep only the newest frame queued so cap.read() never returns stale images
+    if not cap.set(cv2.CAP_PROP_BUFFERSIZE, 1):
+        print("WARNING: Camera backend ignored buffer size - frames may lag")
+    # Ask UVC cameras for compressed MJPG so they can hit the requested FPS
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
     cap.set(cv2.CAP_PROP_FPS, TARGET_FPS)
@@ -677,396 +1505,473 @@ def main():
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     backend = cap.getBackendName()
+    fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+    pixel_format = "".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4))
+    camera_fps = cap.get(cv2.CAP_PROP_FPS)
     
     print(f"\nCamera {CAMERA_INDEX} initialized successfully!")
-    print(f"Resolution: {width}x{height} | Backend: {backend}")
+    print(f"Resolution: {width}x{height} @ {camera_fps:.0f} FPS | Format: {pixel_format} | Backend: {backend}")
+    if pixel_format != 'MJPG':
+        print("WARNING: Camera did not accept MJPG - uncompressed frames use more USB bandwidth")
+    if (USE_OPENCL or ARUCO_USE_OPENCL) and OPENCL_AVAILABLE:
+        cv2.ocl.setUseOpenCL(True)
+    if USE_CUDA and CUDA_AVAILABLE and not RED_DETECT_BGR:
+        print("Red blob detection: CUDA")
+    elif USE_OPENCL and OPENCL_AVAILABLE:
+        print(f"Red blob detection: OpenCL ({cv2.ocl.Device.getDefault().name()})")
+    elif USE_NUMBA and NUMBA_AVAILABLE and not RED_DETECT_BGR:
+        print("Red blob detection: Numba")
+        # Compile now (full frame and ROI view layouts) rather than on the first pickup
+        warmup = np.zeros((4 * BLOB_DOWNSAMPLE, 4 * BLOB_DOWNSAMPLE, 3), np.uint8)
+        red_mask_numba(warmup)
+        red_mask_numba(warmup[1:, 1:])
+    else:
+        print("Red blob detection: CPU")
     print("Position your camera directly above the 5×5 grid...")
     print("Tracking Aruco markers...\n")
     
-    # Variables for FPS calculation
-    fps_start_time = time.time()
-    fps_frame_count = 0
-    fps_display = 0
-    
-    # Toggle states
-    show_grid = SHOW_GRID_OVERLAY
-    
-    # Send timing
-    last_send_time = 0
-    
-    # Pico status
-    pico_status = "WAITING"
-    
-    # Position verifier for red blob
-    verifier = PositionVerifier(duration=VERIFY_DURATION)
-    blob_verified = False
-    
-    # Workflow state for multi-plate system
-    pickup_initiated = False
-    active_marker_id = None
-    target_position = None  # (row, col) where marker should be placed
-    plates_completed = 0  # Track how many plates have been placed
-    max_plates = 2  # Support 2 plates
-    workflow_complete = False
-    detected_marker_ids = set()  # Track IDs already detected to prevent duplicates
-    
-    # Grid calibration
-    v_lines = None
-    h_lines = None
-    grid_calibrated = False
-    calibration_frames = 0
-    manual_confirmed = False
-    
-    # Set up mouse callback for manual grid selection
-    cv2.namedWindow('Aruco WiFi Tracker - Forge Registry', cv2.WINDOW_NORMAL)
-    cv2.resizeWindow('Aruco WiFi Tracker - Forge Registry', 800, 600)
-    cv2.setMouseCallback('Aruco WiFi Tracker - Forge Registry', mouse_callback)
-    
-    # OCR Number Detection Phase
-    plate1_target = None
-    plate2_target = None
-    number_detected = False
-    
-    if TESSERACT_AVAILABLE:
-        print("\n" + "="*70)
-        print("STEP 1: NUMBER DETECTION")
-        print("="*70)
-        print("Place a paper with a 4-digit number (e.g., 4235) in view.")
-        print("  - First 2 digits = Plate 1 target coordinates (row, col)")
-        print("  - Last 2 digits = Plate 2 target coordinates (row, col)")
-        print("  - All digits must be 1-5 for the 5x5 grid")
-        print("Press 'n' when ready to detect the number, or 's' to skip...\n")
-        
-        while not number_detected:
-            ret, frame = cap.read()
-            if not ret:
-                print("ERROR: Failed to capture frame!")
-                break
-            
-            # Show preview
-            preview = frame.copy()
-            cv2.putText(preview, "Place 4-digit number in view", (10, 30),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-            cv2.putText(preview, "Press 'n' to detect, 's' to skip", (10, 60),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-            cv2.imshow('Aruco WiFi Tracker - Forge Registry', preview)
-            
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord('n'):
-                # Attempt detection
-                print("\nDetecting number...")
-                number_str = detect_4digit_number(frame)
-                if number_str:
-                    coords = parse_target_coords(number_str)
-                    if coords:
-                        plate1_target = (coords[0], coords[1])
-                        plate2_target = (coords[2], coords[3])
-                        number_detected = True
-                        print(f"\n*** NUMBER DETECTED: {number_str} ***")
-                        print(f"Plate 1 -> ({coords[0]+1},{coords[1]+1})")
-                        print(f"Plate 2 -> ({coords[2]+1},{coords[3]+1})\n")
-                    else:
-                        print("Invalid coordinates detected. Try again or press 's' to skip.")
-                else:
-                    print("No 4-digit number detected. Try again or press 's' to skip.")
-            elif key == ord('s'):
-                print("\nSkipping number detection - using default targets\n")
-                break
-            elif key == ord('q'):
-                print("\nQuitting...")
-                cap.release()
-                cv2.destroyAllWindows()
-                if ser:
-                    ser.close()
-                return
-    else:
-        print("\nWARNING: Tesseract OCR not available - using default target positions\n")
+    # Start background capture so USB transfers overlap with processing
+    grabber = FrameGrabber(cap)
+    grabber.start()
     
-    # Use defaults if not detected
-    if plate1_target is None:
-        plate1_target = (4, 1)  # Default: position (5,2) in 1-indexed from "5234"
-        plate2_target = (2, 3)  # Default: position (3,4) in 1-indexed from "5234"
-        print(f"Using default targets: Plate1=({plate1_target[0]+1},{plate1_target[1]+1}), Plate2=({plate2_target[0]+1},{plate2_target[1]+1})")
+    # Worker for red-blob detection so it overlaps ArUco detection (both release the GIL)
+    detect_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
     
-    while True:
-        # Capture frame
-        ret, frame = cap.read()
+    # Everything below is torn down in the finally block - on 'q', camera loss and Ctrl+C alike
+    display = None
+    try:
+        # Variables for FPS calculation
+        fps_deadline = time.monotonic() + 1.0  # End of the current 1 s FPS window
+        fps_frame_count = 0
+        fps_display = 0
+        display_frame_count = 0
         
-        if not ret:
-            print("ERROR: Failed to capture frame!")
-            break
+        # Toggle states
+        show_grid = SHOW_GRID_OVERLAY
         
-        height, width = frame.shape[:2]
+        # Send timing
+        last_send_time = 0
         
-        # Manual grid mode
-        if manual_confirmed and len(manual_grid_corners) == 2:
-            v_lines, h_lines = create_manual_grid(width, height)
-            if v_lines is not None:
-                grid_calibrated = True
-                print(f"\n*** MANUAL GRID CALIBRATED ***")
-                print(f"Grid corners: {manual_grid_corners}\n")
-                manual_confirmed = False  # Only print once
+        # Pico status
+        pico_status = "WAITING"
         
-        # Draw manual calibration points
-        if MANUAL_GRID_MODE:
-            for i, (x, y) in enumerate(manual_grid_corners):
-                cv2.circle(frame, (x, y), 10, (0, 255, 255), -1)
-                cv2.putText(frame, f"Corner {i+1}", (x + 15, y - 10),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-            if len(manual_grid_corners) == 2 and not manual_confirmed:
-                cv2.putText(frame, "Press 'c' to confirm grid", (10, height - 50),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+        # Position verifier for red blob
+        verifier = PositionVerifier(duration=VERIFY_DURATION)
+        blob_verified = False
         
-        # Detect ArUco markers
-        corners, ids, marker_data = detect_aruco_markers(frame, ARUCO_DICT)
+        # Workflow state for multi-plate system
+        pickup_initiated = False
+        active_marker_id = None
+        target_position = None  # (row, col) where marker should be placed
+        plates_completed = 0  # Track how many plates have been placed
+        max_plates = 2  # Support 2 plates
+        workflow_complete = False
+        used_marker_mask = 0  # Bit per marker ID already picked up (DICT_4X4_50 IDs fit one int)
         
-        # Add grid coordinates to marker data (only if grid is calibrated)
-        for data in marker_data:
-            if v_lines is not None and h_lines is not None:
-                # Use detected grid lines to determine grid slot
-                row, col = pixel_to_grid_calibrated(data['center_x'], data['center_y'], v_lines, h_lines)
-                data['grid_row'] = row
-                data['grid_col'] = col
-            else:
-                # No grid detected - cannot assign grid position
-                data['grid_row'] = None
-                data['grid_col'] = None
+        # Grid calibration
+        v_lines = None
+        h_lines = None
+        grid_calibrated = False
+        calibration_frames = 0
+        manual_confirmed = False
         
-        # Check for ArUco at position (1,1) to initiate pickup
-        if not pickup_initiated and marker_data and grid_calibrated:
-            for data in marker_data:
-                # Position (1,1) in 1-indexed = (0,0) in 0-indexed
-                # Skip if this marker ID was already detected/used
-                if data['grid_row'] == 0 and data['grid_col'] == 0 and data['id'] not in detected_marker_ids:
-                    pickup_initiated = True
-                    active_marker_id = data['id']
-                    detected_marker_ids.add(data['id'])  # Mark this ID as used
-                    
-                    # Use detected target coordinates based on which plate we're on
-                    if plates_completed == 0:
-                        target_row, target_col = plate1_target
+        # Open the window with the mouse callback for manual grid selection
+        if not HEADLESS:
+            display = DisplayWindow(WINDOW_NAME, 800, 600, mouse_callback, THREADED_DISPLAY).start()
+        
+        # Preset grid corners skip the mouse calibration
+        if GRID_CORNERS is not None:
+            manual_grid_corners = list(GRID_CORNERS)
+            manual_confirmed = True
+        elif HEADLESS:
+            print("WARNING: HEADLESS without GRID_CORNERS - grid cannot be calibrated, nothing will be sent")
+        
+        # Detection timing (headless runs detect at the send rate, not the capture rate)
+        detect_interval = DETECT_INTERVAL if HEADLESS else 0.0
+        last_detect_time = 0
+        frames_since_detect = ARUCO_DETECT_STRIDE
+        corners, ids, marker_data = None, None, []
+        
+        # OCR Number Detection Phase
+        plate1_target = None
+        plate2_target = None
+        number_detected = False
+        
+        if TESSERACT_AVAILABLE and not HEADLESS:
+            print("\n" + "="*70)
+            print("STEP 1: NUMBER DETECTION")
+            print("="*70)
+            print("Place a paper with a 4-digit number (e.g., 4235) inside the yellow box.")
+            print("  - First 2 digits = Plate 1 target coordinates (row, col)")
+            print("  - Last 2 digits = Plate 2 target coordinates (row, col)")
+            print("  - All digits must be 1-5 for the 5x5 grid")
+            print("Press 'n' when ready to detect the number, or 's' to skip...\n")
+            
+            ocr_future = None  # OCR runs on the detection worker so the preview stays live
+            ocr_requested = False
+            while not number_detected:
+                frame = grabber.get()
+                if frame is None:
+                    print("ERROR: Failed to capture frame!")
+                    break
+                
+                # Collect a finished OCR result
+                if ocr_future is not None and ocr_future.done():
+                    number_str = ocr_future.result()
+                    ocr_future = None
+                    if number_str:
+                        coords = parse_target_coords(number_str)
+                        if coords:
+                            plate1_target = (coords[0], coords[1])
+                            plate2_target = (coords[2], coords[3])
+                            number_detected = True
+                            print(f"\n*** NUMBER DETECTED: {number_str} ***")
+                            print(f"Plate 1 -> ({coords[0]+1},{coords[1]+1})")
+                            print(f"Plate 2 -> ({coords[2]+1},{coords[3]+1})\n")
+                        else:
+                            print("Invalid coordinates detected. Try again or press 's' to skip.")
                     else:
-                        target_row, target_col = plate2_target
-                    
-                    target_position = (target_row, target_col)
-                    
-                    if not test_mode:
-                        send_pickup_command(ser, active_marker_id, target_row, target_col)
-                    print(f"\n*** PICKUP INITIATED: Marker {active_marker_id} at (1,1) ***")
-                    print(f"*** Target position: ({target_row+1},{target_col+1}) ***\n")
-                    
-                    # Set target for blob verification
-                    verifier.set_target(target_row, target_col)
+                        print("No 4-digit number detected. Try again or press 's' to skip.")
+                
+                # Hand OCR its square of this frame before anything is drawn on it
+                x1, y1, x2, y2 = ocr_roi(frame)
+                if ocr_requested:
+                    ocr_future = detect_pool.submit(detect_4digit_number, frame[y1:y2, x1:x2].copy())
+                    ocr_requested = False
+                
+                # Show preview with the OCR search area (drawn in place - the grabber never decodes into the frame being shown)
+                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 255), 2)
+                cv2.putText(frame, "Place 4-digit number in the box", (10, 30),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+                prompt = "Detecting..." if ocr_future is not None else "Press 'n' to detect, 's' to skip"
+                cv2.putText(frame, prompt, (10, 60),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+                display.show(frame)
+                
+                key = display.poll_key()
+                if key == ord('n') and ocr_future is None and not ocr_requested:
+                    # Attempt detection in the background on the next (undrawn) frame
+                    print("\nDetecting number...")
+                    ocr_requested = True
+                elif key == ord('s'):
+                    print("\nSkipping number detection - using default targets\n")
                     break
+                elif key == ord('q'):
+                    print("\nQuitting...")
+                    return
+        else:
+            print("\nWARNING: Tesseract OCR not available - using default target positions\n")
         
-        # Detect red blob (electromagnet)
-        blob_cx, blob_cy, blob_area = detect_red_blob(frame)
-        blob_row, blob_col = None, None
+        # Use defaults if not detected
+        if plate1_target is None:
+            plate1_target = (4, 1)  # Default: position (5,2) in 1-indexed from "5234"
+            plate2_target = (2, 3)  # Default: position (3,4) in 1-indexed from "5234"
+            print(f"Using default targets: Plate1=({plate1_target[0]+1},{plate1_target[1]+1}), Plate2=({plate2_target[0]+1},{plate2_target[1]+1})")
         
-        if blob_cx is not None:
-            # Use detected grid lines to determine blob position
+        while True:
+            # Get newest frame from the capture thread
+            frame = grabber.get()
+            
+            if frame is None:
+                log_message("ERROR: Failed to capture frame!")
+                break
+            
+            height, width = frame.shape[:2]
+            current_time = time.monotonic()
+            
+            # Manual grid mode
+            if manual_confirmed and len(manual_grid_corners) == 2:
+                v_lines, h_lines = create_manual_grid(width, height)
+                if v_lines is not None:
+                    grid_calibrated = True
+                    log_message(f"\n*** MANUAL GRID CALIBRATED ***")
+                    log_message(f"Grid corners: {manual_grid_corners}\n")
+                    manual_confirmed = False  # Only print once
+            
+            # Detect red blob (electromagnet) in the background while ArUco runs here -
+            # its position is only used once a pickup has started
+            blob_future = None
+            if pickup_initiated or BLOB_ALWAYS_DETECT:
+                blob_future = detect_pool.submit(track_red_blob, frame)
+            
+            # Detect ArUco markers (reuse the previous result between detections)
+            frames_since_detect += 1
+            if frames_since_detect >= ARUCO_DETECT_STRIDE and current_time - last_detect_time >= detect_interval:
+                # Grayscale copy for ArUco detection and its motion check (before any drawing)
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                corners, ids, marker_data = detect_aruco_markers(gray)
+                last_detect_time = current_time
+                frames_since_detect = 0
+            
+            # Add grid coordinates to marker data (only if grid is calibrated)
             if v_lines is not None and h_lines is not None:
-                blob_row, blob_col = pixel_to_grid_calibrated(blob_cx, blob_cy, v_lines, h_lines)
-            # If no grid detected, blob position is unknown
+                # Use detected grid lines to determine grid slots for all markers at once
+                rows, cols = pixel_to_grid_calibrated_batch([data['center_x'] for data in marker_data],
+                                                            [data['center_y'] for data in marker_data],
+                                                            v_lines, h_lines)
+                for data, row, col in zip(marker_data, rows.tolist(), cols.tolist()):
+                    data['grid_row'] = row if row >= 0 else None
+                    data['grid_col'] = col if col >= 0 else None
+            else:
+                # No grid detected - cannot assign grid position
+                for data in marker_data:
+                    data['grid_row'] = None
+                    data['grid_col'] = None
+            
+            # Check for ArUco at position (1,1) to initiate pickup
+            if not pickup_initiated and marker_data and grid_calibrated:
+                for data in marker_data:
+                    # Position (1,1) in 1-indexed = (0,0) in 0-indexed
+                    # Skip if this marker ID was already detected/used
+                    if data['grid_row'] == 0 and data['grid_col'] == 0 and not used_marker_mask >> data['id'] & 1:
+                        pickup_initiated = True
+                        active_marker_id = data['id']
+                        used_marker_mask |= 1 << data['id']  # Mark this ID as used
+                        
+                        # Use detected target coordinates based on which plate we're on
+                        if plates_completed == 0:
+                            target_row, target_col = plate1_target
+                        else:
+                            target_row, target_col = plate2_target
+                        
+                        target_position = (target_row, target_col)
+                        
+                        if not test_mode:
+                            send_pickup_command(ser, active_marker_id, target_row, target_col)
+                        log_message(f"\n*** PICKUP INITIATED: Marker {active_marker_id} at (1,1) ***")
+                        log_message(f"*** Target position: ({target_row+1},{target_col+1}) ***\n")
+                        
+                        # Set target for blob verification
+                        verifier.set_target(target_row, target_col)
+                        break
+            
+            # Collect red blob (electromagnet) result
+            blob_cx, blob_cy, blob_area = blob_future.result() if blob_future else (None, None, 0)
+            blob_row, blob_col = None, None
             
-            # Verify blob position if pickup has been initiated
-            if pickup_initiated and not blob_verified and target_position is not None:
-                target_row, target_col = target_position
+            if blob_cx is not None:
+                # Use detected grid lines to determine blob position
+                if v_lines is not None and h_lines is not None:
+                    blob_row, blob_col = pixel_to_grid_calibrated(blob_cx, blob_cy, v_lines, h_lines)
+                # If no grid detected, blob position is unknown
                 
-                # Update verifier with current blob position
-                if verifier.update(blob_row, blob_col):
-                    # Blob has been at target for full duration
-                    blob_verified = True
-                    plates_completed += 1
+                # Verify blob position if pickup has been initiated
+                if pickup_initiated and not blob_verified and target_position is not None:
+                    target_row, target_col = target_position
+                    
+                    # Update verifier with current blob position
+                    if verifier.update(blob_row, blob_col, current_time):
+                        # Blob has been at target for full duration
+                        blob_verified = True
+                        plates_completed += 1
+                        if not test_mode:
+                            send_release_command(ser)
+                            log_message(f"\n*** VERIFIED: Blob held at ({target_row+1},{target_col+1}) for {VERIFY_DURATION}s - RELEASE sent ***\n")
+                        else:
+                            log_message(f"\n*** VERIFIED: Blob held at ({target_row+1},{target_col+1}) for {VERIFY_DURATION}s - (TEST MODE) ***\n")
+                        
+                        # Reset for next plate if not complete
+                        if plates_completed < max_plates:
+                            log_message(f"\n*** Plate {plates_completed}/{max_plates} complete. Waiting for next ArUco at (1,1)... ***\n")
+                            pickup_initiated = False
+                            active_marker_id = None
+                            target_position = None
+                            blob_verified = False
+                            verifier.reset()
+                        else:
+                            log_message(f"\n*** ALL {max_plates} PLATES COMPLETE! ***\n")
+                            workflow_complete = True
+            
+            # Send data to Pico at specified interval (only after grid is calibrated)
+            if grid_calibrated and current_time - last_send_time >= SEND_INTERVAL:
+                if pickup_initiated and active_marker_id is not None and blob_row is not None:
+                    # During pickup/movement: send BLOB position for real-time LCD update
                     if not test_mode:
-                        send_release_command(ser)
-                        print(f"\n*** VERIFIED: Blob held at ({target_row+1},{target_col+1}) for {VERIFY_DURATION}s - RELEASE sent ***\n")
+                        success = send_blob_position(ser, active_marker_id, blob_row, blob_col)
+                        pico_status = f"BLOB ({blob_row+1},{blob_col+1})" if success else "BLOB FAILED"
                     else:
-                        print(f"\n*** VERIFIED: Blob held at ({target_row+1},{target_col+1}) for {VERIFY_DURATION}s - (TEST MODE) ***\n")
-                    
-                    # Reset for next plate if not complete
-                    if plates_completed < max_plates:
-                        print(f"\n*** Plate {plates_completed}/{max_plates} complete. Waiting for next ArUco at (1,1)... ***\n")
-                        pickup_initiated = False
-                        active_marker_id = None
-                        target_position = None
-                        blob_verified = False
-                        verifier.reset()
+                        pico_status = f"BLOB TEST ({blob_row+1},{blob_col+1})"
+                elif marker_data:
+                    # Before pickup: send ArUco marker data
+                    if not test_mode:
+                        success = send_marker_data(ser, marker_data)
+                        pico_status = "SENT" if success else "FAILED"
                     else:
-                        print(f"\n*** ALL {max_plates} PLATES COMPLETE! ***\n")
-                        workflow_complete = True
-        
-        # Send data to Pico at specified interval (only after grid is calibrated)
-        current_time = time.time()
-        if grid_calibrated and current_time - last_send_time >= SEND_INTERVAL:
-            if pickup_initiated and active_marker_id is not None and blob_row is not None:
-                # During pickup/movement: send BLOB position for real-time LCD update
-                if not test_mode:
-                    success = send_blob_position(ser, active_marker_id, blob_row, blob_col)
-                    pico_status = f"BLOB ({blob_row+1},{blob_col+1})" if success else "BLOB FAILED"
+                        pico_status = "TEST MODE"
                 else:
-                    pico_status = f"BLOB TEST ({blob_row+1},{blob_col+1})"
-            elif marker_data:
-                # Before pickup: send ArUco marker data
-                if not test_mode:
-                    success = send_marker_data(ser, marker_data)
-                    pico_status = "SENT" if success else "FAILED"
+                    pico_status = "NO MARKERS"
+                last_send_time = current_time
+            elif not grid_calibrated:
+                pico_status = "CALIBRATING"
+            
+            # Headless: nothing to draw or show
+            if HEADLESS:
+                continue
+            
+            # Count FPS on every frame, drawn or not
+            fps_frame_count += 1
+            if current_time >= fps_deadline:
+                fps_display = fps_frame_count
+                fps_frame_count = 0
+                fps_deadline = current_time + 1.0
+            
+            # Handle keyboard input ('s' draws the current frame on demand to save it)
+            key = display.poll_key()
+            
+            # Only frames that are shown (or saved) are drawn on - drawing and the GUI roundtrip are costly
+            display_frame_count += 1
+            if display_frame_count >= DISPLAY_EVERY_N_FRAMES or key == ord('s'):
+                # Draw manual calibration points
+                if MANUAL_GRID_MODE:
+                    for i, (x, y) in enumerate(manual_grid_corners):
+                        cv2.circle(frame, (x, y), 10, (0, 255, 255), -1)
+                        cv2.putText(frame, f"Corner {i+1}", (x + 15, y - 10),
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+                    if len(manual_grid_corners) == 2 and not manual_confirmed:
+                        cv2.putText(frame, "Press 'c' to confirm grid", (10, height - 50),
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+                
+                # Draw markers on frame
+                frame = draw_aruco_markers(frame, corners, ids, marker_data)
+                
+                # Draw red blob detection
+                if blob_cx is not None:
+                    progress = verifier.get_progress(current_time)
+                    frame = draw_red_blob(frame, blob_cx, blob_cy, blob_row, blob_col, 
+                                        blob_verified, progress)
+                
+                # Highlight cells with markers
+                for data in marker_data:
+                    if 'grid_row' in data and 'grid_col' in data and data['grid_row'] is not None and data['grid_col'] is not None:
+                        # Use different colors for different marker IDs
+                        color = (0, 255, 0) if data['id'] == 1 else (255, 0, 255)
+                        frame = highlight_cell(frame, data['grid_row'], data['grid_col'], GRID_SIZE, color)
+                
+                # Draw grid overlay
+                if show_grid and v_lines is not None and h_lines is not None:
+                    # Draw detected grid
+                    frame = draw_detected_grid(frame, v_lines, h_lines)
+                
+                # Display calibration status (static text - cached like the HUD)
+                if not grid_calibrated:
+                    calib_text = "Press 'm' to set manual grid"
+                    draw_hud(frame, ((calib_text, (10, height - 20), 0.6, (0, 255, 255), 2),))
+                elif v_lines is not None:
+                    draw_hud(frame, (("Grid: MANUAL CALIBRATED", (10, height - 20), 0.5, (0, 255, 0), 1),))
+                
+                # Stable HUD text is collected here and drawn in one cached pass below;
+                # per-frame values (verify %, FPS) would miss the cache, so they are drawn directly
+                hud = []
+                live_hud = []
+                
+                # Display marker count
+                marker_count_text = f"Markers: {len(marker_data)}"
+                hud.append((marker_count_text, (10, 35), 0.9, (0, 255, 0), 2))
+                
+                # Display Pico status
+                status_color = (0, 255, 0) if "ACK" in pico_status else (0, 165, 255)
+                hud.append((f"Pico: {pico_status}", (10, 70), 0.8, status_color, 2))
+                
+                # Display detected marker IDs
+                if marker_data:
+                    valid_markers = [m for m in marker_data if m['grid_row'] is not None and m['grid_col'] is not None]
+                    if valid_markers:
+                        ids_text = "IDs: " + ", ".join([f"{m['id']}@({m['grid_row']+1},{m['grid_col']+1})" 
+                                                        for m in valid_markers])
+                    else:
+                        ids_text = f"Markers: {len(marker_data)} detected (no grid)"
+                    hud.append((ids_text, (10, 105), 0.7, (255, 255, 0), 2))
+                
+                # Display workflow status
+                workflow_y = 140
+                if not grid_calibrated:
+                    workflow_text = "Status: WAITING for grid calibration"
+                    hud.append((workflow_text, (10, workflow_y), 0.8, (255, 165, 0), 2))
+                elif workflow_complete:
+                    workflow_text = f"Status: ALL {max_plates} PLATES COMPLETE!"
+                    hud.append((workflow_text, (10, workflow_y), 0.8, (0, 255, 0), 2))
+                elif pickup_initiated:
+                    if blob_verified:
+                        workflow_text = f"Status: Plate {plates_completed}/{max_plates} - PLACED"
+                        workflow_color = (0, 255, 0)
+                    elif target_position:
+                        target_r, target_c = target_position
+                        workflow_text = f"Status: Plate {plates_completed+1}/{max_plates} - Moving to ({target_r+1},{target_c+1})"
+                        workflow_color = (0, 165, 255)
+                    else:
+                        workflow_text = f"Status: Plate {plates_completed+1}/{max_plates} - PICKUP Marker {active_marker_id}"
+                        workflow_color = (255, 165, 0)
+                    hud.append((workflow_text, (10, workflow_y), 0.8, workflow_color, 2))
                 else:
-                    pico_status = "TEST MODE"
-            else:
-                pico_status = "NO MARKERS"
-            last_send_time = current_time
-        elif not grid_calibrated:
-            pico_status = "CALIBRATING"
-        
-        # Draw markers on frame
-        frame = draw_aruco_markers(frame, corners, ids, marker_data)
-        
-        # Draw red blob detection
-        if blob_cx is not None:
-            progress = verifier.get_progress()
-            frame = draw_red_blob(frame, blob_cx, blob_cy, blob_row, blob_col, 
-                                blob_verified, progress)
-        
-        # Highlight cells with markers
-        for data in marker_data:
-            if 'grid_row' in data and 'grid_col' in data and data['grid_row'] is not None and data['grid_col'] is not None:
-                # Use different colors for different marker IDs
-                color = (0, 255, 0) if data['id'] == 1 else (255, 0, 255)
-                frame = highlight_cell(frame, data['grid_row'], data['grid_col'], GRID_SIZE, color)
-        
-        # Draw grid overlay
-        if show_grid and v_lines is not None and h_lines is not None:
-            # Draw detected grid
-            frame = draw_detected_grid(frame, v_lines, h_lines)
-        
-        # Display calibration status
-        if not grid_calibrated:
-            calib_text = "Press 'm' to set manual grid"
-            cv2.putText(frame, calib_text, (10, height - 20),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-        elif v_lines is not None:
-            cv2.putText(frame, "Grid: MANUAL CALIBRATED", (10, height - 20),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
-        
-        # Display marker count
-        marker_count_text = f"Markers: {len(marker_data)}"
-        cv2.putText(frame, marker_count_text, (10, 35), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
-        
-        # Display Pico status
-        status_color = (0, 255, 0) if "ACK" in pico_status else (0, 165, 255)
-        cv2.putText(frame, f"Pico: {pico_status}", (10, 70), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, status_color, 2)
-        
-        # Display detected marker IDs
-        if marker_data:
-            valid_markers = [m for m in marker_data if m['grid_row'] is not None and m['grid_col'] is not None]
-            if valid_markers:
-                ids_text = "IDs: " + ", ".join([f"{m['id']}@({m['grid_row']+1},{m['grid_col']+1})" 
-                                                for m in valid_markers])
-            else:
-                ids_text = f"Markers: {len(marker_data)} detected (no grid)"
-            cv2.putText(frame, ids_text, (10, 105), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-        
-        # Display workflow status
-        workflow_y = 140
-        if not grid_calibrated:
-            workflow_text = "Status: WAITING for grid calibration"
-            cv2.putText(frame, workflow_text, (10, workflow_y),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 165, 0), 2)
-        elif workflow_complete:
-            workflow_text = f"Status: ALL {max_plates} PLATES COMPLETE!"
-            cv2.putText(frame, workflow_text, (10, workflow_y),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-        elif pickup_initiated:
-            if blob_verified:
-                workflow_text = f"Status: Plate {plates_completed}/{max_plates} - PLACED"
-                workflow_color = (0, 255, 0)
-            elif target_position:
-                target_r, target_c = target_position
-                workflow_text = f"Status: Plate {plates_completed+1}/{max_plates} - Moving to ({target_r+1},{target_c+1})"
-                workflow_color = (0, 165, 255)
-            else:
-                workflow_text = f"Status: Plate {plates_completed+1}/{max_plates} - PICKUP Marker {active_marker_id}"
-                workflow_color = (255, 165, 0)
-            cv2.putText(frame, workflow_text, (10, workflow_y),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, workflow_color, 2)
-        else:
-            workflow_text = f"Status: Plate {plates_completed+1}/{max_plates} - WAITING for ArUco at (1,1)"
-            cv2.putText(frame, workflow_text, (10, workflow_y),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (200, 200, 200), 2)
-        
-        # Display blob verification status
-        if blob_cx is not None and pickup_initiated:
-            if blob_verified:
-                verify_text = "VERIFIED - RELEASED"
-                verify_color = (0, 255, 0)
-            elif verifier.target_row is not None:
-                progress = verifier.get_progress()
-                verify_text = f"Verifying: {int(progress*100)}%"
-                verify_color = (0, 165, 255)
-            else:
-                verify_text = "Blob Detected"
-                verify_color = (255, 255, 0)
+                    workflow_text = f"Status: Plate {plates_completed+1}/{max_plates} - WAITING for ArUco at (1,1)"
+                    hud.append((workflow_text, (10, workflow_y), 0.8, (200, 200, 200), 2))
+                
+                # Display blob verification status
+                if blob_cx is not None and pickup_initiated:
+                    if blob_verified:
+                        verify_text = "VERIFIED - RELEASED"
+                        verify_color = (0, 255, 0)
+                    elif verifier.target_row is not None:
+                        progress = verifier.get_progress(current_time)
+                        verify_text = f"Verifying: {int(progress*100)}%"
+                        verify_color = (0, 165, 255)
+                    else:
+                        verify_text = "Blob Detected"
+                        verify_color = (255, 255, 0)
+                    
+                    live_hud.append((verify_text, (10, workflow_y + 35), 0.8, verify_color, 2))
+                
+                # Display FPS
+                if SHOW_FPS:
+                    live_hud.append((f"FPS: {fps_display}", (width - 140, 35), 0.8, (255, 255, 0), 2))
+                
+                draw_hud(frame, tuple(hud))
+                render_hud(frame, live_hud)
+                
+                # Display frame in resizable window
+                if display_frame_count >= DISPLAY_EVERY_N_FRAMES:
+                    display_frame_count = 0
+                    display.show(frame)
             
-            cv2.putText(frame, verify_text, (10, workflow_y + 35),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, verify_color, 2)
-        
-        # Calculate and display FPS
-        fps_frame_count += 1
-        if time.time() - fps_start_time >= 1.0:
-            fps_display = fps_frame_count
-            fps_frame_count = 0
-            fps_start_time = time.time()
-        
-        if SHOW_FPS:
-            cv2.putText(frame, f"FPS: {fps_display}", (width - 140, 35), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 0), 2)
-        
-        # Display frame in resizable window
-        cv2.namedWindow('Aruco WiFi Tracker - Forge Registry', cv2.WINDOW_NORMAL)
-        cv2.resizeWindow('Aruco WiFi Tracker - Forge Registry', 800, 600)
-        cv2.imshow('Aruco WiFi Tracker - Forge Registry', frame)
-        
-        # Handle keyboard input
-        key = cv2.waitKey(1) & 0xFF
-        
-        if key == ord('q'):
-            print("\n\nShutting down...")
-            break
-        elif key == ord('m'):
-            MANUAL_GRID_MODE = not MANUAL_GRID_MODE
-            manual_grid_corners = []
-            manual_confirmed = False
-            grid_calibrated = False
-            v_lines = None
-            h_lines = None
-            print(f"\nManual grid mode: {'ON - Click 2 corners (top-left, bottom-right)' if MANUAL_GRID_MODE else 'OFF'}")
-        elif key == ord('c') and MANUAL_GRID_MODE and len(manual_grid_corners) == 2:
-            manual_confirmed = True
-            print("\nManual grid confirmed!")
-        elif key == ord('r') and MANUAL_GRID_MODE:
-            manual_grid_corners = []
-            manual_confirmed = False
-            grid_calibrated = False
-            v_lines = None
-            h_lines = None
-            print("\nManual grid reset - click 2 new corners")
-        elif key == ord('g'):
-            show_grid = not show_grid
-            print(f"\nGrid overlay: {'ON' if show_grid else 'OFF'}")
-        elif key == ord('s'):
-            filename = f"aruco_capture_{int(time.time())}.jpg"
-            cv2.imwrite(filename, frame)
-            print(f"\nFrame saved as {filename}")
-    
-    # Cleanup
-    cap.release()
-    cv2.destroyAllWindows()
-    if ser:
-        ser.close()
+            if key == ord('q'):
+                log_message("\n\nShutting down...")
+                break
+            elif key == ord('m'):
+                MANUAL_GRID_MODE = not MANUAL_GRID_MODE
+                manual_grid_corners = []
+                manual_confirmed = False
+                grid_calibrated = False
+                v_lines = None
+                h_lines = None
+                log_message(f"\nManual grid mode: {'ON - Click 2 corners (top-left, bottom-right)' if MANUAL_GRID_MODE else 'OFF'}")
+            elif key == ord('c') and MANUAL_GRID_MODE and len(manual_grid_corners) == 2:
+                manual_confirmed = True
+                log_message("\nManual grid confirmed!")
+            elif key == ord('r') and MANUAL_GRID_MODE:
+                manual_grid_corners = []
+                manual_confirmed = False
+                grid_calibrated = False
+                v_lines = None
+                h_lines = None
+                log_message("\nManual grid reset - click 2 new corners")
+            elif key == ord('g'):
+                show_grid = not show_grid
+                log_message(f"\nGrid overlay: {'ON' if show_grid else 'OFF'}")
+            elif key == ord('s'):
+                filename = f"aruco_capture_{int(time.time())}.jpg"
+                cv2.imwrite(filename, frame)
+                log_message(f"\nFrame saved as {filename}")
+    finally:
+        # Closing the serial writer sends anything still queued (e.g. RELEASE)
+        flush_log()
+        detect_pool.shutdown()
+        grabber.stop()
+        cap.release()
+        if display is not None:
+            display.stop()
+        if ser:
+            ser.close()
+    
     print("Application closed successfully.")
 
 # ============================================================================
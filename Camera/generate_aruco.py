@@ -3,26 +3,48 @@ Generate ArUco markers for testing
 """
 import cv2
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
 # ArUco dictionary
 aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
 
-# Generate markers (IDs 0-9)
-for marker_id in range(10):
-    # Create marker image (200x200 pixels)
-    marker_image = cv2.aruco.generateImageMarker(aruco_dict, marker_id, 200)
-    
-    # Add white border for printing
-    marker_with_border = cv2.copyMakeBorder(marker_image, 20, 20, 20, 20, 
-                                            cv2.BORDER_CONSTANT, value=255)
-    
+MARKER_COUNT = 10    # Generate IDs 0-9
+MARKER_SIZE = 200    # Marker image size in pixels
+BORDER = 20          # White border for printing
+SHEET_COLUMNS = 5    # Markers per row on the combined sheet
+
+# Markers are flat black/white line art - fast zlib level with run-length strategy
+PNG_PARAMS = [cv2.IMWRITE_PNG_COMPRESSION, 1,
+              cv2.IMWRITE_PNG_STRATEGY, cv2.IMWRITE_PNG_STRATEGY_RLE]
+
+tile_size = MARKER_SIZE + 2 * BORDER
+sheet_rows = (MARKER_COUNT + SHEET_COLUMNS - 1) // SHEET_COLUMNS
+
+# All markers are drawn straight into one white sheet; each tile is a view into it
+sheet = np.full((sheet_rows * tile_size, SHEET_COLUMNS * tile_size), 255, np.uint8)
+tiles = []
+
+for marker_id in range(MARKER_COUNT):
+    row, col = divmod(marker_id, SHEET_COLUMNS)
+    tile = sheet[row * tile_size:(row + 1) * tile_size, col * tile_size:(col + 1) * tile_size]
+
+    # Create marker image inside the white border
+    tile[BORDER:BORDER + MARKER_SIZE, BORDER:BORDER + MARKER_SIZE] = \
+        cv2.aruco.generateImageMarker(aruco_dict, marker_id, MARKER_SIZE)
+
     # Add ID label
-    cv2.putText(marker_with_border, f"ID: {marker_id}", (10, 15),
+    cv2.putText(tile, f"ID: {marker_id}", (10, 15),
                 cv2.FONT_HERSHEY_SIMPLEX, 0.5, 0, 2)
-    
-    # Save marker
-    filename = f"aruco_marker_{marker_id}.png"
-    cv2.imwrite(filename, marker_with_border)
-    print(f"Generated: {filename}")
+    tiles.append((f"aruco_marker_{marker_id}.png", tile))
+
+# PNG encoding releases the GIL, so the individual files are written in parallel
+with ThreadPoolExecutor(max_workers=4) as pool:
+    results = pool.map(lambda item: cv2.imwrite(*item, PNG_PARAMS), tiles)
+    for (filename, _), ok in zip(tiles, results):
+        print(f"Generated: {filename}" if ok else f"ERROR: Failed to write {filename}")
+
+# Every marker on one page
+cv2.imwrite("aruco_sheet.png", sheet, PNG_PARAMS)
+print("Generated: aruco_sheet.png")
 
 print("\nDone! Print these markers or display them on your phone to test.")
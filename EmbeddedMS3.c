@@ -710,6 +710,25 @@ bool button_check(void) {
 static char serial_buffer[128];
 static uint8_t serial_idx = 0;
 
+// Binary position frame: POSITION_SYNC followed by id, row, col bytes
+#define POSITION_SYNC 0xAA
+#define POSITION_PAYLOAD_LEN 3
+static uint8_t position_payload[POSITION_PAYLOAD_LEN];
+static int8_t position_idx = -1;  // -1 when not inside a binary frame
+
+void handle_position(int id, int row, int col) {
+    camera_data.detected_marker.id = id;
+    camera_data.detected_marker.grid_row = row;
+    camera_data.detected_marker.grid_col = col;
+    camera_data.detected_marker.valid = true;
+    camera_data.marker_detected = true;
+    camera_data.current_x = col;
+    camera_data.current_y = row;
+    camera_data.last_update_time = to_ms_since_boot(get_absolute_time());
+    printf("SER RX -> ID:%d ROW:%d COL:%d\n", id, row, col);
+    // LCD update handled by unified update_lcd() in main loop
+}
+
 void handle_serial_line(const char *line) {
     // Check for PICKUP command: PICKUP,id,target_row,target_col
     if (strncmp(line, "PICKUP,", 7) == 0) {
@@ -763,16 +782,7 @@ void handle_serial_line(const char *line) {
     // Expected format: id,row,col (all ints, 0-indexed)
     int id = 0, row = 0, col = 0;
     if (sscanf(line, "%d,%d,%d", &id, &row, &col) == 3) {
-        camera_data.detected_marker.id = id;
-        camera_data.detected_marker.grid_row = row;
-        camera_data.detected_marker.grid_col = col;
-        camera_data.detected_marker.valid = true;
-        camera_data.marker_detected = true;
-        camera_data.current_x = col;
-        camera_data.current_y = row;
-        camera_data.last_update_time = to_ms_since_boot(get_absolute_time());
-        printf("SER RX -> ID:%d ROW:%d COL:%d\n", id, row, col);
-        // LCD update handled by unified update_lcd() in main loop
+        handle_position(id, row, col);
     }
 }
 
@@ -782,6 +792,21 @@ void poll_serial(void) {
         if (ch == PICO_ERROR_TIMEOUT) {
             break;
         }
+        // Binary position frame payload (bytes may look like '\r' or '\n')
+        if (position_idx >= 0) {
+            position_payload[position_idx++] = (uint8_t)ch;
+            if (position_idx == POSITION_PAYLOAD_LEN) {
+                handle_position(position_payload[0], position_payload[1], position_payload[2]);
+                position_idx = -1;
+            }
+            continue;
+        }
+        // Sync byte never appears in text commands, so it always starts a frame
+        if (ch == POSITION_SYNC) {
+            serial_idx = 0;
+            position_idx = 0;
+            continue;
+        }
         if (ch == '\r') {
             continue;
         }